@@ -0,0 +1,37 @@
+"""add item and product version
+
+Revision ID: 3c7f1e9a4b28
+Revises: 9d4a7e3b2c61
+Create Date: 2026-10-17 16:21:44.318207
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "3c7f1e9a4b28"
+down_revision: Union[str, None] = "9d4a7e3b2c61"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        "items",
+        sa.Column("version", sa.Integer(), server_default="1", nullable=False),
+    )
+    op.add_column(
+        "products",
+        sa.Column("version", sa.Integer(), server_default="1", nullable=False),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("products", "version")
+    op.drop_column("items", "version")
@@ -0,0 +1,32 @@
+"""add owner_id indexes
+
+Revision ID: 5b8e2f4c1a7d
+Revises: 432d6607b0b7
+Create Date: 2026-10-17 10:12:41.318204
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "5b8e2f4c1a7d"
+down_revision: Union[str, None] = "432d6607b0b7"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index("ix_items_owner_id_id", "items", ["owner_id", "id"], unique=False)
+    op.create_index(
+        "ix_products_owner_id_id", "products", ["owner_id", "id"], unique=False
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_products_owner_id_id", table_name="products")
+    op.drop_index("ix_items_owner_id_id", table_name="items")
@@ -0,0 +1,46 @@
+"""add user token_revoked_at
+
+Revision ID: 6f1d8b3a9e57
+Revises: 3c7f1e9a4b28
+Create Date: 2026-10-17 22:05:12.604318
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "6f1d8b3a9e57"
+down_revision: Union[str, None] = "3c7f1e9a4b28"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        "users",
+        sa.Column("token_revoked_at", sa.DateTime(timezone=True), nullable=True),
+    )
+    # Existing bumps count as recent, so tokens they revoked stay rejected
+    # until those tokens expire.
+    op.execute(
+        "UPDATE users SET token_revoked_at = CURRENT_TIMESTAMP WHERE token_version > 0"
+    )
+    op.create_index(
+        "ix_users_token_revoked_at",
+        "users",
+        ["token_revoked_at"],
+        unique=False,
+        postgresql_where=sa.text("token_version > 0"),
+        sqlite_where=sa.text("token_version > 0"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_users_token_revoked_at", table_name="users")
+    op.drop_column("users", "token_revoked_at")
@@ -0,0 +1,32 @@
+"""add user token_version
+
+Revision ID: 9d4a7e3b2c61
+Revises: 5b8e2f4c1a7d
+Create Date: 2026-10-17 14:03:27.905113
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "9d4a7e3b2c61"
+down_revision: Union[str, None] = "5b8e2f4c1a7d"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        "users",
+        sa.Column("token_version", sa.Integer(), server_default="0", nullable=False),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("users", "token_version")
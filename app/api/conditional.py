@@ -0,0 +1,43 @@
+"""Conditional request helpers built on the row `version` column.
+
+A resource's ETag is its version quoted, e.g. `"3"`. Every write bumps the
+version, so the tag is strong: equal tags mean byte-identical representations.
+"""
+
+
+def make_etag(version: int) -> str:
+    return f'"{version}"'
+
+
+def _parse_tags(header: str) -> list[str]:
+    return [tag.strip() for tag in header.split(",") if tag.strip()]
+
+
+def _opaque(tag: str) -> str:
+    return tag[2:] if tag.startswith("W/") else tag
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Whether `If-None-Match` matches `etag` (weak comparison, RFC 9110)"""
+    if not if_none_match:
+        return False
+    tags = _parse_tags(if_none_match)
+    return "*" in tags or any(_opaque(tag) == etag for tag in tags)
+
+
+def if_match_versions(if_match: str | None) -> list[int] | None:
+    """Versions an `If-Match` header accepts, or None when it allows any.
+
+    Uses strong comparison, so weak tags never match; a header whose tags are
+    all unusable yields an empty list, which no row satisfies.
+    """
+    if not if_match:
+        return None
+    tags = _parse_tags(if_match)
+    if "*" in tags:
+        return None
+    versions = []
+    for tag in tags:
+        if len(tag) > 2 and tag[0] == tag[-1] == '"' and tag[1:-1].isdigit():
+            versions.append(int(tag[1:-1]))
+    return versions
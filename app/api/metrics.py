@@ -0,0 +1,12 @@
+from fastapi import APIRouter, Depends, Response
+
+from app.core.metrics import CONTENT_TYPE, registry
+from app.core.security import require_admin
+
+router = APIRouter()
+
+
+@router.get("/metrics", include_in_schema=False, dependencies=[Depends(require_admin)])
+async def metrics() -> Response:
+    """Prometheus scrape endpoint; scrape with an admin bearer token"""
+    return Response(registry.render(), media_type=CONTENT_TYPE)
@@ -0,0 +1,161 @@
+import hmac
+import json
+import logging
+import random
+import time
+
+from starlette.datastructures import MutableHeaders
+
+from app.core.config import settings
+from app.core.metrics import registry
+from app.core.profiling import cprofile_active, loop_profile, request_profiles
+from app.core.timing import start_request_timing, stop_request_timing
+
+logger = logging.getLogger(__name__)
+
+HTTP_REQUESTS = registry.counter(
+    "http_requests_total",
+    "HTTP requests by route template",
+    ["method", "route", "status"],
+)
+HTTP_REQUEST_SECONDS = registry.histogram(
+    "http_request_duration_seconds",
+    "Time from receiving a request to sending the last response byte",
+    ["method", "route"],
+)
+HTTP_IN_PROGRESS = registry.gauge(
+    "http_requests_in_progress", "HTTP requests currently being handled"
+)
+
+
+def _route_template(scope) -> str:
+    # Set by the router on match; unmatched paths share one label so that
+    # scanners cannot blow up the number of series.
+    route = scope.get("route")
+    return getattr(route, "path_format", None) or "unmatched"
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording per-route latency and requests in flight.
+
+    Labels use the route template (e.g. `/api/v1/items/{item_id}`) rather
+    than the raw path. Streaming responses are timed until the body is sent.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        HTTP_IN_PROGRESS.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - start
+            HTTP_IN_PROGRESS.dec()
+            method, route = scope["method"], _route_template(scope)
+            HTTP_REQUEST_SECONDS.observe(elapsed, method=method, route=route)
+            HTTP_REQUESTS.inc(method=method, route=route, status=str(status_code))
+
+
+class TimingMiddleware:
+    """ASGI middleware timing the phases of a sampled fraction of requests.
+
+    Requests slower than SLOW_REQUEST_THRESHOLD_MS log their full trace as
+    one JSON line. With SERVER_TIMING_HEADER on, sampled responses also carry
+    a `Server-Timing` header with the phase totals gathered up to the start
+    of the response.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if (
+            scope["type"] != "http"
+            or random.random() >= settings.REQUEST_TIMING_SAMPLE_RATE
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        timing, token = start_request_timing()
+        status_code = 500
+
+        async def send_with_timing(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if settings.SERVER_TIMING_HEADER:
+                    headers = MutableHeaders(scope=message)
+                    headers.append("Server-Timing", timing.server_timing())
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            stop_request_timing(token)
+            if timing.elapsed() * 1000 >= settings.SLOW_REQUEST_THRESHOLD_MS:
+                trace = {
+                    "method": scope["method"],
+                    "route": _route_template(scope),
+                    "path": scope["path"],
+                    "status": status_code,
+                    **timing.trace(),
+                }
+                logger.warning("slow request %s", json.dumps(trace))
+
+
+def _profile_requested(scope) -> bool:
+    expected = settings.PROFILE_REQUEST_KEY.encode()
+    for name, value in scope["headers"]:
+        if name == b"x-profile":
+            return hmac.compare_digest(value, expected)
+    return False
+
+
+class ProfilingMiddleware:
+    """ASGI middleware running cProfile for requests sending the profile key.
+
+    The response carries `X-Profile-Id`; an admin fetches the result from
+    `/admin/profiles/{id}`. cProfile sees the whole event loop, so requests
+    running at the same time show up too. One request is profiled at a
+    time; others sending the header meanwhile run unprofiled.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if (
+            scope["type"] != "http"
+            or not _profile_requested(scope)
+            or cprofile_active()
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = request_profiles.next_id()
+
+        async def send_with_profile_id(message):
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                headers.append("X-Profile-Id", str(profile_id))
+            await send(message)
+
+        with loop_profile() as profiler:
+            try:
+                await self.app(scope, receive, send_with_profile_id)
+            finally:
+                request_profiles.store(profile_id, profiler)
@@ -0,0 +1,59 @@
+from functools import lru_cache
+from typing import Any, Mapping
+
+from fastapi import Response
+from pydantic import TypeAdapter
+
+from app.core.config import settings
+
+
+@lru_cache(maxsize=None)
+def _adapter(model_type: Any) -> TypeAdapter:
+    return TypeAdapter(model_type)
+
+
+class PydanticJSONResponse(Response):
+    """JSON response serialized by pydantic-core against a response type.
+
+    Validation and encoding both run in pydantic-core, producing bytes in
+    one pass instead of FastAPI's response_model validation followed by
+    `json.dumps`. Rows are cheapest to validate as plain dicts (see
+    `row_dicts`); ORM instances work too but are read attribute by attribute.
+    """
+
+    media_type = "application/json"
+
+    def __init__(
+        self,
+        model_type: Any,
+        content: Any,
+        status_code: int = 200,
+        headers: Mapping[str, str] | None = None,
+    ):
+        self.model_type = model_type
+        super().__init__(content, status_code=status_code, headers=headers)
+
+    def render(self, content: Any) -> bytes:
+        adapter = _adapter(self.model_type)
+        return adapter.dump_json(adapter.validate_python(content, from_attributes=True))
+
+
+def model_response(
+    model_type: Any,
+    content: Any,
+    status_code: int = 200,
+    headers: Mapping[str, str] | None = None,
+    response: Response | None = None,
+) -> Any:
+    """Return `content` through PydanticJSONResponse when FAST_JSON_RESPONSES is on.
+
+    With the setting off, `content` is returned unchanged and FastAPI
+    serializes it as usual, so the route's `response_model` stays the single
+    source of the OpenAPI schema either way. `headers` are applied in both
+    modes; pass the injected `response` so they reach FastAPI's response.
+    """
+    if settings.FAST_JSON_RESPONSES:
+        return PydanticJSONResponse(model_type, content, status_code, headers)
+    if headers and response is not None:
+        response.headers.update(headers)
+    return content
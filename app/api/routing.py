@@ -0,0 +1,89 @@
+import functools
+import time
+
+from fastapi.routing import APIRoute
+
+from app.core.database import release_request_session
+from app.core.timing import current_timing
+
+
+# Routers re-create their routes from the already wrapped endpoint each time
+# they are included; the flags (copied along by functools.wraps) keep every
+# wrapper from being applied more than once.
+
+
+def _release_db_after(endpoint):
+    if getattr(endpoint, "_releases_db", False):
+        return endpoint
+
+    @functools.wraps(endpoint)
+    async def wrapper(*args, **kwargs):
+        try:
+            return await endpoint(*args, **kwargs)
+        finally:
+            await release_request_session()
+
+    wrapper._releases_db = True
+    return wrapper
+
+
+def _time_endpoint(endpoint):
+    if getattr(endpoint, "_timed", False):
+        return endpoint
+
+    @functools.wraps(endpoint)
+    async def wrapper(*args, **kwargs):
+        timing = current_timing()
+        if timing is None:
+            return await endpoint(*args, **kwargs)
+        start = time.perf_counter()
+        if timing.route_started is not None:
+            timing.add("deps", start - timing.route_started)
+        try:
+            return await endpoint(*args, **kwargs)
+        finally:
+            timing.handler_finished = time.perf_counter()
+            timing.add("handler", timing.handler_finished - start)
+
+    wrapper._timed = True
+    return wrapper
+
+
+class TimedRoute(APIRoute):
+    """Route that splits a sampled request into deps, handler and encode phases.
+
+    "deps" is dependency resolution (including "auth"), "handler" the endpoint
+    body and "encode" the response model validation and serialization that
+    FastAPI does after the endpoint returns.
+    """
+
+    def __init__(self, path, endpoint, **kwargs):
+        super().__init__(path, _time_endpoint(endpoint), **kwargs)
+
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+
+        async def timed_handler(request):
+            timing = current_timing()
+            if timing is None:
+                return await handler(request)
+            timing.route_started = time.perf_counter()
+            timing.handler_finished = None
+            response = await handler(request)
+            if timing.handler_finished is not None:
+                timing.add("encode", time.perf_counter() - timing.handler_finished)
+            return response
+
+        return timed_handler
+
+
+class ReleaseDBRoute(TimedRoute):
+    """Route that hands the request's DB connection back once the handler returns.
+
+    Without this the session from `get_db` is only closed when FastAPI tears
+    down dependencies, i.e. after the response model has been validated and
+    serialized, keeping the connection checked out for that whole time.
+    """
+
+    def __init__(self, path, endpoint, **kwargs):
+        super().__init__(path, _release_db_after(endpoint), **kwargs)
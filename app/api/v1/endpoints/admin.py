@@ -0,0 +1,134 @@
+import asyncio
+from typing import Literal
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.routing import ReleaseDBRoute
+from app.core.config import settings
+from app.core.database import get_db, get_pool_status
+from app.core.profiling import (
+    ProfilerBusy,
+    loop_profile,
+    pstats_dump,
+    pstats_text,
+    request_profiles,
+    sample_stacks,
+)
+from app.core.security import require_admin
+from app.core.statement_stats import statement_stats
+from app.schemas.admin import StatementStat
+from app.schemas.user import UserResponse, UserUpdate
+from app.services.user_service import UserService
+
+router = APIRouter(route_class=ReleaseDBRoute, dependencies=[Depends(require_admin)])
+
+
+@router.get("/db/pool")
+async def pool_status() -> dict:
+    """Connection pool usage of the primary and each replica engine"""
+    return get_pool_status()
+
+
+@router.get("/db/statements", response_model=list[StatementStat])
+async def list_statement_stats(
+    sort: Literal["total_ms", "count", "avg_ms", "max_ms", "rows"] = "total_ms",
+    limit: int = Query(50, ge=1, le=1000),
+):
+    """Statement fingerprints since startup or the last reset, busiest first"""
+    return statement_stats.snapshot(sort, limit)
+
+
+@router.delete("/db/statements", status_code=status.HTTP_204_NO_CONTENT)
+async def reset_statement_stats():
+    """Start a fresh measurement window"""
+    statement_stats.reset()
+
+
+@router.patch("/users/{user_id}", response_model=UserResponse)
+async def update_user(
+    user_id: int, user_data: UserUpdate, db: AsyncSession = Depends(get_db)
+):
+    """Change a user's email or password; either revokes their local tokens"""
+    if user_data.email is not None:
+        existing = await UserService.get_user_by_email(db, user_data.email)
+        if existing is not None and existing.id != user_id:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Email already registered",
+            )
+    user = await UserService.update_user(db, user_id, user_data)
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    return user
+
+
+@router.post("/users/{user_id}/revoke-tokens", status_code=status.HTTP_204_NO_CONTENT)
+async def revoke_user_tokens(user_id: int, db: AsyncSession = Depends(get_db)):
+    """Invalidate every local token issued to the user so far"""
+    if not await UserService.revoke_tokens(db, user_id):
+        raise HTTPException(status_code=404, detail="User not found")
+
+
+@router.delete("/users/{user_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_user(user_id: int, db: AsyncSession = Depends(get_db)):
+    """Delete a user who owns nothing; their local tokens stop working at once"""
+    try:
+        deleted = await UserService.delete_user(db, user_id)
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="User still owns items or products",
+        )
+    if not deleted:
+        raise HTTPException(status_code=404, detail="User not found")
+
+
+def _pstats_response(profiler, name: str) -> Response:
+    return Response(
+        pstats_dump(profiler),
+        media_type="application/octet-stream",
+        headers={"Content-Disposition": f'attachment; filename="{name}.prof"'},
+    )
+
+
+@router.get("/profile")
+async def profile_worker(
+    seconds: float = Query(10.0, gt=0, le=settings.PROFILE_MAX_SECONDS),
+    format: Literal["collapsed", "pstats"] = "collapsed",
+    interval_ms: float = Query(5.0, ge=1, le=100),
+):
+    """Profile this worker for `seconds` while it serves live traffic.
+
+    `collapsed` samples every thread's stack and returns the input format of
+    flamegraph.pl / speedscope; `pstats` runs cProfile on the event loop and
+    returns a `.prof` file for snakeviz or `python -m pstats`.
+    """
+    if format == "collapsed":
+        stacks = await asyncio.to_thread(sample_stacks, seconds, interval_ms / 1000)
+        return Response(stacks, media_type="text/plain")
+    try:
+        with loop_profile() as profiler:
+            await asyncio.sleep(seconds)
+    except ProfilerBusy:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT, detail="A profile is already running"
+        )
+    return _pstats_response(profiler, "worker")
+
+
+@router.get("/profiles/{profile_id}")
+async def get_request_profile(
+    profile_id: int, format: Literal["pstats", "text"] = "pstats"
+):
+    """Profile of a request sent with the `X-Profile` header"""
+    profiler = request_profiles.get(profile_id)
+    if profiler is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Profile not found"
+        )
+    if format == "text":
+        return Response(pstats_text(profiler), media_type="text/plain")
+    return _pstats_response(profiler, f"request-{profile_id}")
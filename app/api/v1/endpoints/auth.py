@@ -1,10 +1,12 @@
 from datetime import timedelta
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
-from httpx import AsyncClient
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.api.routing import ReleaseDBRoute
 from app.core.database import get_db
+from app.core.http_client import get_http_client
+from app.core.m2m_tokens import m2m_token_cache
 from app.core.security import (
     create_access_token,
 )
@@ -13,7 +15,7 @@ from app.services.user_service import UserService
 from app.schemas.auth import M2MLogin
 from app.schemas.user import UserCreate, UserResponse, Token
 
-router = APIRouter()
+router = APIRouter(route_class=ReleaseDBRoute)
 
 
 @router.post("/register", response_model=UserResponse)
@@ -43,9 +45,10 @@ async def login(
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    access_token_expires = timedelta(minutes=30)
+    access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        data={"sub": str(user.id)}, expires_delta=access_token_expires
+        data={"sub": str(user.id), "email": user.email, "ver": user.token_version},
+        expires_delta=access_token_expires,
     )
     return {"access_token": access_token, "token_type": "bearer"}
 
@@ -56,7 +59,7 @@ async def m2m_login(m2m_data: M2MLogin):
     if not app_config:
         raise HTTPException(status_code=400, detail="Invalid application ID")
 
-    async with AsyncClient() as client:
+    async def fetch_token() -> dict:
         payload = {
             "client_id": app_config["client_id"],
             "client_secret": app_config["client_secret"],
@@ -65,7 +68,7 @@ async def m2m_login(m2m_data: M2MLogin):
         }
         headers = {"content-type": "application/json"}
 
-        response = await client.post(
+        response = await get_http_client().post(
             f"https://{settings.AUTH0_DOMAIN}/oauth/token",
             json=payload,
             headers=headers,
@@ -75,3 +78,7 @@ async def m2m_login(m2m_data: M2MLogin):
             raise HTTPException(status_code=response.status_code, detail=response.text)
 
         return response.json()
+
+    return await m2m_token_cache.get_or_fetch(
+        f"{m2m_data.app_id}:{settings.AUTH0_API_AUDIENCE}", fetch_token
+    )
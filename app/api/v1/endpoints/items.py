@@ -1,57 +1,258 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.security import get_current_user, check_authorization
-from app.core.database import get_db
-from app.services.item_service import ItemService
-from app.schemas.item import ItemUpdate, ItemCreate, ItemResponse
+from app.api.conditional import etag_matches, if_match_versions, make_etag
+from app.api.responses import model_response
+from app.api.routing import ReleaseDBRoute
+from app.core.config import settings
+from app.core.security import (
+    authorized_owner_id,
+    check_authorization,
+    client_key,
+    get_current_user,
+    owner_id_of,
+)
+from app.core.database import get_db, get_read_db, read_session, read_your_writes
+from app.core.export import ExportFormat, export_response
+from app.services.item_service import EXPORT_COLUMNS, ItemService
+from app.schemas.item import (
+    ItemUpdate,
+    ItemCreate,
+    ItemResponse,
+    ItemPage,
+    ItemBulkCreate,
+    ItemBulkUpdate,
+    ItemBulkDelete,
+    ItemBulkResult,
+)
 
-router = APIRouter()
+router = APIRouter(route_class=ReleaseDBRoute)
+
+
+def _check_batch_size(size: int) -> None:
+    if size > settings.MAX_BULK_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Batch size exceeds {settings.MAX_BULK_SIZE}",
+        )
+
+
+async def _raise_write_failure(
+    db: AsyncSession, item_id: int, owner_id: int | None
+) -> None:
+    """Tell 404, 403 and 412 apart once a scoped write has matched no row"""
+    current = await ItemService.get_owner_and_version(db, item_id)
+    if current is None:
+        raise HTTPException(status_code=404, detail="Item not found")
+    if owner_id is not None and current[0] != owner_id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions",
+        )
+    raise HTTPException(
+        status_code=status.HTTP_412_PRECONDITION_FAILED,
+        detail="Item has been modified",
+        headers={"ETag": make_etag(current[1])},
+    )
 
 
 @router.post("/", status_code=status.HTTP_201_CREATED, response_model=ItemResponse)
 async def create_item(
     item_data: ItemCreate,
+    response: Response,
     current_user: dict = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
     """Only owners can create items for themselves"""
     check_authorization(current_user, item_data.owner_id, "create:items")
-    return await ItemService.create_item(db, item_data, item_data.owner_id)
+    item = await ItemService.create_item(db, item_data, item_data.owner_id)
+    return model_response(
+        ItemResponse,
+        item,
+        status.HTTP_201_CREATED,
+        headers={"ETag": make_etag(item.version)},
+        response=response,
+    )
+
+
+@router.get("/", response_model=ItemPage)
+async def list_items(
+    owner_id: int | None = None,
+    min_price: float | None = None,
+    max_price: float | None = None,
+    cursor: int | None = Query(None, description="Last item id of the previous page"),
+    limit: int = Query(settings.DEFAULT_PAGE_SIZE, ge=1, le=settings.MAX_PAGE_SIZE),
+    current_user: dict = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """M2M with read scope can list any items, users can list their own items"""
+    if owner_id is None and not current_user.get("is_m2m", False):
+        owner_id = owner_id_of(current_user)
+    check_authorization(current_user, owner_id, "read:items")
+
+    items = await ItemService.list_items(
+        db,
+        owner_id=owner_id,
+        min_price=min_price,
+        max_price=max_price,
+        after_id=cursor,
+        limit=limit + 1,
+    )
+    next_cursor = None
+    if len(items) > limit:
+        items = items[:limit]
+        next_cursor = items[-1]["id"]
+    return model_response(ItemPage, {"items": items, "next_cursor": next_cursor})
+
+
+@router.get("/export")
+async def export_items(
+    export_format: ExportFormat = Query("ndjson", alias="format"),
+    owner_id: int | None = None,
+    current_user: dict = Depends(get_current_user),
+):
+    """Stream items as NDJSON or CSV; same access rules as listing"""
+    if owner_id is None and not current_user.get("is_m2m", False):
+        owner_id = owner_id_of(current_user)
+    check_authorization(current_user, owner_id, "read:items")
+
+    async def rows():
+        # The session lives as long as the stream, not the request handler.
+        async with read_session(client_key(current_user)) as db:
+            async for row in ItemService.stream_items(
+                db, owner_id=owner_id, batch_size=settings.EXPORT_BATCH_SIZE
+            ):
+                yield row
+
+    return export_response(rows(), export_format, EXPORT_COLUMNS, "items")
+
+
+@router.post(
+    "/bulk",
+    status_code=status.HTTP_201_CREATED,
+    response_model=list[ItemBulkResult],
+)
+async def bulk_create_items(
+    bulk_data: ItemBulkCreate,
+    current_user: dict = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """Only owners can create items for themselves, checked once per owner"""
+    _check_batch_size(len(bulk_data.items))
+    for owner_id in {item_data.owner_id for item_data in bulk_data.items}:
+        check_authorization(current_user, owner_id, "create:items")
+
+    items = await ItemService.bulk_create_items(db, bulk_data.items)
+    return model_response(
+        list[ItemBulkResult],
+        [{"id": item["id"], "status": "created", "item": item} for item in items],
+        status.HTTP_201_CREATED,
+    )
+
+
+@router.put("/bulk", response_model=list[ItemBulkResult])
+async def bulk_update_items(
+    bulk_data: ItemBulkUpdate,
+    current_user: dict = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """M2M with update scope or owners can update items, checked once per owner"""
+    _check_batch_size(len(bulk_data.ids))
+    owner_ids = await ItemService.get_owner_ids(db, bulk_data.ids, lock=True)
+    for owner_id in set(owner_ids.values()):
+        check_authorization(current_user, owner_id, "update:items")
+
+    updated = {
+        item["id"]: item
+        for item in await ItemService.bulk_update_items(
+            db, list(owner_ids), bulk_data.changes
+        )
+    }
+    return model_response(
+        list[ItemBulkResult],
+        [
+            {"id": item_id, "status": "updated", "item": updated[item_id]}
+            if item_id in updated
+            else {"id": item_id, "status": "not_found"}
+            for item_id in bulk_data.ids
+        ],
+    )
+
+
+@router.post("/bulk/delete", response_model=list[ItemBulkResult])
+async def bulk_delete_items(
+    bulk_data: ItemBulkDelete,
+    current_user: dict = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """Only owners can delete items (M2M not allowed), checked once per owner"""
+    _check_batch_size(len(bulk_data.ids))
+    owner_ids = await ItemService.get_owner_ids(db, bulk_data.ids, lock=True)
+    for owner_id in set(owner_ids.values()):
+        check_authorization(current_user, owner_id, "delete:items")
+
+    deleted = set(await ItemService.bulk_delete_items(db, list(owner_ids)))
+    return model_response(
+        list[ItemBulkResult],
+        [
+            {"id": item_id, "status": "deleted" if item_id in deleted else "not_found"}
+            for item_id in bulk_data.ids
+        ],
+    )
 
 
 @router.get("/{item_id}", response_model=ItemResponse)
 async def read_item(
     item_id: int,
+    response: Response,
+    if_none_match: str | None = Header(None),
     current_user: dict = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ):
     """M2M with read scope can read any item, users can read their own items"""
-    item = await ItemService.get_item(db, item_id)
+    # A client that just wrote reads from the primary, past the cache: caches
+    # are per worker, and another worker's may still hold the row from before
+    # that write until it expires.
+    use_cache = not read_your_writes.is_sticky(client_key(current_user))
+    item = await ItemService.get_item_response(db, item_id, use_cache)
     if not item:
         raise HTTPException(status_code=404, detail="Item not found")
 
     check_authorization(current_user, item.owner_id, "read:items")
-    return item
+    etag = make_etag(item.version)
+    if etag_matches(if_none_match, etag):
+        return Response(
+            status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag}
+        )
+    return model_response(ItemResponse, item, headers={"ETag": etag}, response=response)
 
 
 @router.put("/{item_id}", response_model=ItemResponse)
 async def update_item(
     item_id: int,
     item_data: ItemUpdate,
+    response: Response,
+    if_match: str | None = Header(None),
     current_user: dict = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
-    """M2M with update scope or owners can update items"""
-    item = await ItemService.get_item(db, item_id)
-    if not item:
-        raise HTTPException(status_code=404, detail="Item not found")
+    """M2M with update scope or owners can update items.
 
-    check_authorization(current_user, item.owner_id, "update:items")
-    updated_item = await ItemService.update_item(db, item_id, item_data, item.owner_id)
+    With If-Match the update only applies if the item is still at that
+    version; otherwise 412 is returned along with the current ETag.
+    """
+    owner_id = authorized_owner_id(current_user, "update:items")
+    updated_item = await ItemService.update_item(
+        db, item_id, item_data, owner_id, if_match_versions(if_match)
+    )
     if not updated_item:
-        raise HTTPException(status_code=404, detail="Item not found")
-    return updated_item
+        await _raise_write_failure(db, item_id, owner_id)
+    return model_response(
+        ItemResponse,
+        updated_item,
+        headers={"ETag": make_etag(updated_item.version)},
+        response=response,
+    )
 
 
 @router.delete("/{item_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -61,10 +262,6 @@ async def delete_item(
     db: AsyncSession = Depends(get_db),
 ):
     """Only owners can delete items (M2M not allowed)"""
-    item = await ItemService.get_item(db, item_id)
-    if not item:
-        raise HTTPException(status_code=404, detail="Item not found")
-
-    check_authorization(current_user, item.owner_id, "delete:items")
-    if not await ItemService.delete_item(db, item_id, item.owner_id):
-        raise HTTPException(status_code=404, detail="Item not found")
+    owner_id = authorized_owner_id(current_user, "delete:items")
+    if not await ItemService.delete_item(db, item_id, owner_id):
+        await _raise_write_failure(db, item_id, owner_id)
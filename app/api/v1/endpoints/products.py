@@ -1,59 +1,272 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.security import get_current_user, check_authorization
-from app.core.database import get_db
-from app.services.product_service import ProductService
-from app.schemas.product import ProductUpdate, ProductCreate, ProductResponse
+from app.api.conditional import etag_matches, if_match_versions, make_etag
+from app.api.responses import model_response
+from app.api.routing import ReleaseDBRoute
+from app.core.config import settings
+from app.core.security import (
+    authorized_owner_id,
+    check_authorization,
+    client_key,
+    get_current_user,
+    owner_id_of,
+)
+from app.core.database import get_db, get_read_db, read_session, read_your_writes
+from app.core.export import ExportFormat, export_response
+from app.services.product_service import EXPORT_COLUMNS, ProductService
+from app.schemas.product import (
+    ProductUpdate,
+    ProductCreate,
+    ProductResponse,
+    ProductPage,
+    ProductBulkCreate,
+    ProductBulkUpdate,
+    ProductBulkDelete,
+    ProductBulkResult,
+)
 
-router = APIRouter()
+router = APIRouter(route_class=ReleaseDBRoute)
+
+
+def _check_batch_size(size: int) -> None:
+    if size > settings.MAX_BULK_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Batch size exceeds {settings.MAX_BULK_SIZE}",
+        )
+
+
+async def _raise_write_failure(
+    db: AsyncSession, product_id: int, owner_id: int | None
+) -> None:
+    """Tell 404, 403 and 412 apart once a scoped write has matched no row"""
+    current = await ProductService.get_owner_and_version(db, product_id)
+    if current is None:
+        raise HTTPException(status_code=404, detail="Product not found")
+    if owner_id is not None and current[0] != owner_id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions",
+        )
+    raise HTTPException(
+        status_code=status.HTTP_412_PRECONDITION_FAILED,
+        detail="Product has been modified",
+        headers={"ETag": make_etag(current[1])},
+    )
 
 
 @router.post("/", status_code=status.HTTP_201_CREATED, response_model=ProductResponse)
 async def create_product(
     product_data: ProductCreate,
+    response: Response,
     current_user: dict = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
     """Only owners can create products for themselves"""
     check_authorization(current_user, product_data.owner_id, "create:products")
-    return await ProductService.create_product(db, product_data, product_data.owner_id)
+    product = await ProductService.create_product(
+        db, product_data, product_data.owner_id
+    )
+    return model_response(
+        ProductResponse,
+        product,
+        status.HTTP_201_CREATED,
+        headers={"ETag": make_etag(product.version)},
+        response=response,
+    )
+
+
+@router.get("/", response_model=ProductPage)
+async def list_products(
+    owner_id: int | None = None,
+    min_price: float | None = None,
+    max_price: float | None = None,
+    cursor: int | None = Query(
+        None, description="Last product id of the previous page"
+    ),
+    limit: int = Query(settings.DEFAULT_PAGE_SIZE, ge=1, le=settings.MAX_PAGE_SIZE),
+    current_user: dict = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """M2M with read scope can list any products, users can list their own products"""
+    if owner_id is None and not current_user.get("is_m2m", False):
+        owner_id = owner_id_of(current_user)
+    check_authorization(current_user, owner_id, "read:products")
+
+    products = await ProductService.list_products(
+        db,
+        owner_id=owner_id,
+        min_price=min_price,
+        max_price=max_price,
+        after_id=cursor,
+        limit=limit + 1,
+    )
+    next_cursor = None
+    if len(products) > limit:
+        products = products[:limit]
+        next_cursor = products[-1]["id"]
+    return model_response(
+        ProductPage, {"products": products, "next_cursor": next_cursor}
+    )
+
+
+@router.get("/export")
+async def export_products(
+    export_format: ExportFormat = Query("ndjson", alias="format"),
+    owner_id: int | None = None,
+    current_user: dict = Depends(get_current_user),
+):
+    """Stream products as NDJSON or CSV; same access rules as listing"""
+    if owner_id is None and not current_user.get("is_m2m", False):
+        owner_id = owner_id_of(current_user)
+    check_authorization(current_user, owner_id, "read:products")
+
+    async def rows():
+        # The session lives as long as the stream, not the request handler.
+        async with read_session(client_key(current_user)) as db:
+            async for row in ProductService.stream_products(
+                db, owner_id=owner_id, batch_size=settings.EXPORT_BATCH_SIZE
+            ):
+                yield row
+
+    return export_response(rows(), export_format, EXPORT_COLUMNS, "products")
+
+
+@router.post(
+    "/bulk",
+    status_code=status.HTTP_201_CREATED,
+    response_model=list[ProductBulkResult],
+)
+async def bulk_create_products(
+    bulk_data: ProductBulkCreate,
+    current_user: dict = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """Only owners can create products for themselves, checked once per owner"""
+    _check_batch_size(len(bulk_data.products))
+    for owner_id in {product_data.owner_id for product_data in bulk_data.products}:
+        check_authorization(current_user, owner_id, "create:products")
+
+    products = await ProductService.bulk_create_products(db, bulk_data.products)
+    return model_response(
+        list[ProductBulkResult],
+        [
+            {"id": product["id"], "status": "created", "product": product}
+            for product in products
+        ],
+        status.HTTP_201_CREATED,
+    )
+
+
+@router.put("/bulk", response_model=list[ProductBulkResult])
+async def bulk_update_products(
+    bulk_data: ProductBulkUpdate,
+    current_user: dict = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """M2M with update scope or owners can update products, checked once per owner"""
+    _check_batch_size(len(bulk_data.ids))
+    owner_ids = await ProductService.get_owner_ids(db, bulk_data.ids, lock=True)
+    for owner_id in set(owner_ids.values()):
+        check_authorization(current_user, owner_id, "update:products")
+
+    updated = {
+        product["id"]: product
+        for product in await ProductService.bulk_update_products(
+            db, list(owner_ids), bulk_data.changes
+        )
+    }
+    return model_response(
+        list[ProductBulkResult],
+        [
+            {"id": product_id, "status": "updated", "product": updated[product_id]}
+            if product_id in updated
+            else {"id": product_id, "status": "not_found"}
+            for product_id in bulk_data.ids
+        ],
+    )
+
+
+@router.post("/bulk/delete", response_model=list[ProductBulkResult])
+async def bulk_delete_products(
+    bulk_data: ProductBulkDelete,
+    current_user: dict = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """Only owners can delete products (M2M not allowed), checked once per owner"""
+    _check_batch_size(len(bulk_data.ids))
+    owner_ids = await ProductService.get_owner_ids(db, bulk_data.ids, lock=True)
+    for owner_id in set(owner_ids.values()):
+        check_authorization(current_user, owner_id, "delete:products")
+
+    deleted = set(await ProductService.bulk_delete_products(db, list(owner_ids)))
+    return model_response(
+        list[ProductBulkResult],
+        [
+            {
+                "id": product_id,
+                "status": "deleted" if product_id in deleted else "not_found",
+            }
+            for product_id in bulk_data.ids
+        ],
+    )
 
 
 @router.get("/{product_id}", response_model=ProductResponse)
 async def read_product(
     product_id: int,
+    response: Response,
+    if_none_match: str | None = Header(None),
     current_user: dict = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ):
     """M2M with read scope can read any product, users can read their own products"""
-    product = await ProductService.get_product(db, product_id)
+    # A client that just wrote reads from the primary, past the cache: caches
+    # are per worker, and another worker's may still hold the row from before
+    # that write until it expires.
+    use_cache = not read_your_writes.is_sticky(client_key(current_user))
+    product = await ProductService.get_product_response(db, product_id, use_cache)
     if not product:
         raise HTTPException(status_code=404, detail="Product not found")
 
     check_authorization(current_user, product.owner_id, "read:products")
-    return product
+    etag = make_etag(product.version)
+    if etag_matches(if_none_match, etag):
+        return Response(
+            status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag}
+        )
+    return model_response(
+        ProductResponse, product, headers={"ETag": etag}, response=response
+    )
 
 
 @router.put("/{product_id}", response_model=ProductResponse)
 async def update_product(
     product_id: int,
     product_data: ProductUpdate,
+    response: Response,
+    if_match: str | None = Header(None),
     current_user: dict = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
-    """M2M with update scope or owners can update products"""
-    product = await ProductService.get_product(db, product_id)
-    if not product:
-        raise HTTPException(status_code=404, detail="Product not found")
+    """M2M with update scope or owners can update products.
 
-    check_authorization(current_user, product.owner_id, "update:products")
+    With If-Match the update only applies if the product is still at that
+    version; otherwise 412 is returned along with the current ETag.
+    """
+    owner_id = authorized_owner_id(current_user, "update:products")
     updated_product = await ProductService.update_product(
-        db, product_id, product_data, product.owner_id
+        db, product_id, product_data, owner_id, if_match_versions(if_match)
     )
     if not updated_product:
-        raise HTTPException(status_code=404, detail="Product not found")
-    return updated_product
+        await _raise_write_failure(db, product_id, owner_id)
+    return model_response(
+        ProductResponse,
+        updated_product,
+        headers={"ETag": make_etag(updated_product.version)},
+        response=response,
+    )
 
 
 @router.delete("/{product_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -63,10 +276,6 @@ async def delete_product(
     db: AsyncSession = Depends(get_db),
 ):
     """Only owners can delete products (M2M not allowed)"""
-    product = await ProductService.get_product(db, product_id)
-    if not product:
-        raise HTTPException(status_code=404, detail="Product not found")
-
-    check_authorization(current_user, product.owner_id, "delete:products")
-    if not await ProductService.delete_product(db, product_id, product.owner_id):
-        raise HTTPException(status_code=404, detail="Product not found")
+    owner_id = authorized_owner_id(current_user, "delete:products")
+    if not await ProductService.delete_product(db, product_id, owner_id):
+        await _raise_write_failure(db, product_id, owner_id)
@@ -0,0 +1,149 @@
+import json
+import time
+from collections import OrderedDict
+from typing import Protocol
+
+from app.core.config import settings
+from app.core.metrics import registry
+
+CACHE_LOOKUPS = registry.counter(
+    "cache_lookups_total", "Entity cache lookups", ["cache", "result"]
+)
+CACHE_EVICTIONS = registry.counter(
+    "cache_evictions_total", "Entries evicted to stay within capacity", ["cache"]
+)
+CACHE_HIT_RATIO = registry.gauge(
+    "cache_hit_ratio", "Share of entity cache lookups served from the cache", ["cache"]
+)
+
+# Stored in place of a deleted entity so a load that read the row before the
+# delete cannot put it back. Never valid JSON, so never a cached response.
+TOMBSTONE = b""
+
+
+class CacheBackend(Protocol):
+    """Byte-valued key/value store behind EntityCache.
+
+    The in-process InMemoryCache is the default; a shared store (e.g. Redis)
+    can implement the same three coroutines so workers share one cache.
+    """
+
+    async def get(self, key: str) -> bytes | None: ...
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None: ...
+
+    async def delete(self, *keys: str) -> None: ...
+
+
+class InMemoryCache:
+    """LRU cache with per-entry TTL; a capacity of 0 disables caching"""
+
+    def __init__(self, max_entries: int = 10000, name: str = "memory"):
+        self.max_entries = max_entries
+        self.name = name
+        self._entries: OrderedDict[str, tuple[bytes, float]] = OrderedDict()
+
+    async def get(self, key: str) -> bytes | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        if self.max_entries <= 0:
+            return
+        self._entries.pop(key, None)
+        while len(self._entries) >= self.max_entries:
+            self._entries.popitem(last=False)
+            CACHE_EVICTIONS.inc(cache=self.name)
+        self._entries[key] = (value, time.monotonic() + ttl)
+
+    async def delete(self, *keys: str) -> None:
+        for key in keys:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class EntityCache:
+    """Read-through cache of serialized API responses for one entity type.
+
+    Deleted entities leave a tombstone for `tombstone_ttl` seconds, long
+    enough for a load that was in flight during the delete to finish.
+    """
+
+    def __init__(
+        self,
+        backend: CacheBackend,
+        namespace: str,
+        ttl: float,
+        tombstone_ttl: float = 10,
+    ):
+        self.backend = backend
+        self.namespace = namespace
+        self.ttl = ttl
+        self.tombstone_ttl = tombstone_ttl
+        CACHE_HIT_RATIO.set_function(self.hit_ratio, cache=namespace)
+
+    def _key(self, entity_id: int) -> str:
+        return f"{self.namespace}:{entity_id}"
+
+    async def get(self, entity_id: int) -> bytes | None:
+        value = await self.backend.get(self._key(entity_id))
+        if value == TOMBSTONE:
+            value = None
+        CACHE_LOOKUPS.inc(
+            cache=self.namespace, result="miss" if value is None else "hit"
+        )
+        return value
+
+    async def set(
+        self, entity_id: int, value: bytes | str, version: int | None = None
+    ) -> None:
+        """Store `value`, unless the entity was just deleted or is cached at a
+        newer `version`.
+
+        The check is a read followed by a write, so it is only race-free for
+        the in-process backend; a shared one needs a compare-and-set.
+        """
+        if isinstance(value, str):
+            value = value.encode()
+        key = self._key(entity_id)
+        current = await self.backend.get(key)
+        if current == TOMBSTONE:
+            return
+        if (
+            current is not None
+            and version is not None
+            and json.loads(current)["version"] > version
+        ):
+            return
+        await self.backend.set(key, value, self.ttl)
+
+    async def mark_deleted(self, *entity_ids: int) -> None:
+        """Drop deleted entities and keep them out for `tombstone_ttl` seconds"""
+        for entity_id in entity_ids:
+            await self.backend.set(self._key(entity_id), TOMBSTONE, self.tombstone_ttl)
+
+    def hit_ratio(self) -> float:
+        hits = CACHE_LOOKUPS.value(cache=self.namespace, result="hit")
+        misses = CACHE_LOOKUPS.value(cache=self.namespace, result="miss")
+        lookups = hits + misses
+        return hits / lookups if lookups else 0.0
+
+
+entity_cache_backend = InMemoryCache(
+    max_entries=settings.ENTITY_CACHE_MAX_ENTRIES
+    if settings.ENTITY_CACHE_ENABLED
+    else 0,
+    name="entities",
+)
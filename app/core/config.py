@@ -1,6 +1,6 @@
 from pydantic_settings import BaseSettings
-from pydantic import Field
-from typing import Dict, Any
+from pydantic import Field, model_validator
+from typing import Dict, Any, Literal
 
 
 class Settings(BaseSettings):
@@ -15,11 +15,40 @@ class Settings(BaseSettings):
     AUTH0_M2M_CLIENT_ID: str = Field(..., env="AUTH0_M2M_CLIENT_ID")
     AUTH0_M2M_CLIENT_SECRET: str = Field(..., env="AUTH0_M2M_CLIENT_SECRET")
 
+    # Seconds before expiry at which cached M2M tokens are refreshed
+    M2M_TOKEN_CACHE_MARGIN_SECONDS: int = 120
+
+    # Shared outbound HTTP client (Auth0)
+    HTTP_CLIENT_TIMEOUT: float = 5.0
+    HTTP_CLIENT_CONNECT_TIMEOUT: float = 2.0
+    HTTP_CLIENT_MAX_CONNECTIONS: int = 100
+    HTTP_CLIENT_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    HTTP_CLIENT_KEEPALIVE_EXPIRY: float = 30.0
+
+    # JWKS key cache
+    JWKS_CACHE_TTL_SECONDS: int = 3600
+    JWKS_REFRESH_AHEAD_SECONDS: int = 300
+    JWKS_UNKNOWN_KID_COOLDOWN_SECONDS: int = 30
+
     SECRET_KEY: str = Field(..., env="SECRET_KEY")
     ALGORITHM: str = Field("HS256", env="ALGORITHM")
     ACCESS_TOKEN_EXPIRE_MINUTES: int = Field(30, env="ACCESS_TOKEN_EXPIRE_MINUTES")
 
-    # Database settings
+    # Worker threads used for bcrypt hashing/verification
+    PASSWORD_HASH_WORKERS: int = 4
+
+    # Trust email/version claims in local tokens instead of loading the user
+    LOCAL_TOKEN_STATELESS: bool = False
+    TOKEN_REVOCATION_REFRESH_SECONDS: int = 30
+
+    # Verified-token cache
+    TOKEN_CACHE_ENABLED: bool = True
+    TOKEN_CACHE_MAX_SIZE: int = 10000
+
+    # Database settings. DATABASE_URL takes precedence over the POSTGRES_*
+    # parts, e.g. "sqlite+aiosqlite:///./hc_challenge.db" for a local file or
+    # "sqlite+aiosqlite://" for a throwaway in-memory database.
+    DATABASE_URL: str = ""
     POSTGRES_USER: str = "postgres"
     POSTGRES_PASSWORD: str = "admin"
     POSTGRES_HOST: str = "localhost"
@@ -27,9 +56,78 @@ class Settings(BaseSettings):
     POSTGRES_DB: str = "hc_challenge"
     DB_ECHO_LOG: bool = False
 
-    @property
-    def DATABASE_URL(self) -> str:
-        return f"postgresql+asyncpg://{self.POSTGRES_USER}:{self.POSTGRES_PASSWORD}@{self.POSTGRES_HOST}:{self.POSTGRES_PORT}/{self.POSTGRES_DB}"
+    # Per-statement-fingerprint statistics (GET /admin/db/statements) and the
+    # slow-query log, which shows bind parameter types but never their values
+    STATEMENT_STATS_ENABLED: bool = True
+    STATEMENT_STATS_MAX_FINGERPRINTS: int = 1000
+    SLOW_QUERY_THRESHOLD_MS: float = 200.0
+
+    # Who may call the /admin endpoints: M2M tokens carrying ADMIN_SCOPE, or
+    # users whose email is listed in ADMIN_EMAILS
+    ADMIN_SCOPE: str = "admin"
+    ADMIN_EMAILS: list[str] = []
+
+    # On-demand profiling: the /admin/profile endpoints, stack samples
+    # written to PROFILE_OUTPUT_DIR (default: the temp dir) on SIGUSR1, and
+    # cProfile for single requests sending `X-Profile: <PROFILE_REQUEST_KEY>`
+    # (an empty key disables the header)
+    PROFILE_MAX_SECONDS: float = 60.0
+    PROFILE_SIGNAL_ENABLED: bool = True
+    PROFILE_SIGNAL_SECONDS: float = 10.0
+    PROFILE_OUTPUT_DIR: str = ""
+    PROFILE_REQUEST_KEY: str = ""
+    PROFILE_REQUEST_HISTORY: int = 20
+
+    # SQLite tuning (ignored for other backends)
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
+    SQLITE_CACHE_SIZE_KIB: int = 65536
+
+    # Prometheus /metrics endpoint and HTTP request metrics. The endpoint
+    # exposes per-route, pool and auth counters, so it is off unless enabled
+    # and then only serves admins (see ADMIN_SCOPE / ADMIN_EMAILS).
+    METRICS_ENABLED: bool = False
+
+    # Per-request phase timings: fraction of requests traced (0 disables),
+    # whether traced responses expose a Server-Timing header, and the
+    # duration above which a traced request logs its full trace. The header
+    # is for local debugging only: phase timings leak internals to any
+    # caller, e.g. whether a login email exists (bcrypt runs only if it does)
+    REQUEST_TIMING_SAMPLE_RATE: float = 0.01
+    SERVER_TIMING_HEADER: bool = False
+    SLOW_REQUEST_THRESHOLD_MS: float = 500.0
+
+    # List endpoint page sizes
+    DEFAULT_PAGE_SIZE: int = 50
+    MAX_PAGE_SIZE: int = 500
+    MAX_BULK_SIZE: int = 1000
+    EXPORT_BATCH_SIZE: int = 1000
+
+    # Serialize responses straight to JSON bytes in pydantic-core
+    FAST_JSON_RESPONSES: bool = False
+
+    # Read replicas, e.g. '["postgresql+asyncpg://user:pw@replica1/hc_challenge"]'
+    DATABASE_REPLICA_URLS: list[str] = []
+    DB_REPLICA_BALANCING: Literal["round_robin", "least_connections"] = "round_robin"
+    DB_READ_YOUR_WRITES_SECONDS: float = 5.0
+
+    # Item/product response cache
+    ENTITY_CACHE_ENABLED: bool = True
+    ENTITY_CACHE_MAX_ENTRIES: int = 50000
+    ENTITY_CACHE_TTL_SECONDS: int = 60
+
+    # Connection pool settings
+    DB_USE_NULL_POOL: bool = False  # opt-in for pgbouncer-style deployments
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    DB_POOL_TIMEOUT: float = 30.0
+
+    @model_validator(mode="after")
+    def _default_database_url(self) -> "Settings":
+        if not self.DATABASE_URL:
+            self.DATABASE_URL = f"postgresql+asyncpg://{self.POSTGRES_USER}:{self.POSTGRES_PASSWORD}@{self.POSTGRES_HOST}:{self.POSTGRES_PORT}/{self.POSTGRES_DB}"
+        return self
 
     @property
     def JWKS_URL(self) -> str:
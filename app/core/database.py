@@ -1,24 +1,351 @@
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+import itertools
+import time
+from collections import OrderedDict
+from contextvars import ContextVar
+
+from fastapi import Request
+from sqlalchemy import Result, event, exc, make_url
+from sqlalchemy.engine import URL
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine, AsyncSession
 from sqlalchemy.orm import declarative_base, sessionmaker
-from sqlalchemy.pool import NullPool
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool, QueuePool, StaticPool
 
 from app.core.config import settings
+from app.core.metrics import registry
+from app.core.query_metrics import attach_query_metrics
 
 SQLALCHEMY_DATABASE_URL = settings.DATABASE_URL
 
-engine = create_async_engine(
-    SQLALCHEMY_DATABASE_URL,
-    echo=settings.DB_ECHO_LOG,
-    poolclass=NullPool,
+# Pool metrics are labelled by engine: "primary" or "replica-<n>".
+POOL_CHECKOUTS = registry.counter(
+    "db_pool_checkouts_total", "Connections checked out of the pool", ["engine"]
+)
+POOL_CONNECTS = registry.counter(
+    "db_pool_connects_total", "New DBAPI connections opened by the pool", ["engine"]
+)
+POOL_TIMEOUTS = registry.counter(
+    "db_pool_timeouts_total",
+    "Checkouts that gave up after DB_POOL_TIMEOUT",
+    ["engine"],
+)
+POOL_WAIT_SECONDS = registry.histogram(
+    "db_pool_wait_seconds",
+    "Time spent waiting to acquire a pooled connection",
+    ["engine"],
+)
+POOL_IN_USE = registry.gauge(
+    "db_pool_connections_in_use", "Connections currently checked out", ["engine"]
+)
+POOL_IDLE = registry.gauge(
+    "db_pool_connections_idle", "Connections currently idle in the pool", ["engine"]
+)
+READ_ROUTING = registry.counter(
+    "db_read_sessions_total", "Read-only sessions by routing target", ["target"]
 )
-async_session = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
 
-Base = declarative_base()
 
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """Queue pool that records how long callers wait for a connection.
+
+    The engine name comes from `pool_logging_name`, which survives the pool
+    being recreated by `engine.dispose()`.
+    """
 
-async def get_db():
-    async with async_session() as session:
+    def _do_get(self):
+        start = time.perf_counter()
         try:
-            yield session
+            return super()._do_get()
+        except exc.TimeoutError:
+            POOL_TIMEOUTS.inc(engine=self.logging_name)
+            raise
         finally:
+            POOL_WAIT_SECONDS.observe(
+                time.perf_counter() - start, engine=self.logging_name
+            )
+
+
+def _is_sqlite_memory(url: URL) -> bool:
+    return url.database in (None, "", ":memory:") or "mode=memory" in str(url)
+
+
+def _pool_options(url: URL) -> dict:
+    if url.get_backend_name() == "sqlite" and _is_sqlite_memory(url):
+        # Every connection to an in-memory database gets its own empty
+        # database, so all sessions must share a single connection. SQLite
+        # cannot interleave transactions on it, so this suits tests that
+        # issue one request at a time; use a file for concurrent load.
+        return {"poolclass": StaticPool}
+    if settings.DB_USE_NULL_POOL:
+        # Only for deployments where an external pooler (e.g. pgbouncer in
+        # transaction mode) owns the connections.
+        return {"poolclass": NullPool}
+    return {
+        "poolclass": InstrumentedQueuePool,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+    }
+
+
+def _create_engine(url: str, name: str = "primary") -> AsyncEngine:
+    url = make_url(url)
+    created = create_async_engine(
+        url,
+        echo=settings.DB_ECHO_LOG,
+        pool_logging_name=name,
+        **_pool_options(url),
+    )
+    if url.get_backend_name() == "sqlite":
+        event.listen(created.sync_engine, "connect", _set_sqlite_pragmas)
+    _attach_pool_metrics(created, name)
+    attach_query_metrics(created.sync_engine)
+    return created
+
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    # WAL lets readers run alongside the single writer; it is a no-op for
+    # in-memory databases. NORMAL sync is durable in WAL mode except across
+    # power loss, which is fine for local and benchmark use.
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute(f"PRAGMA busy_timeout={settings.SQLITE_BUSY_TIMEOUT_MS}")
+    cursor.execute(f"PRAGMA cache_size=-{settings.SQLITE_CACHE_SIZE_KIB}")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.execute("PRAGMA foreign_keys=ON")
+    cursor.close()
+
+
+def _attach_pool_metrics(target: AsyncEngine, name: str) -> None:
+    @event.listens_for(target.sync_engine, "connect")
+    def on_connect(dbapi_connection, connection_record):
+        POOL_CONNECTS.inc(engine=name)
+
+    @event.listens_for(target.sync_engine, "checkout")
+    def on_checkout(dbapi_connection, connection_record, connection_proxy):
+        POOL_CHECKOUTS.inc(engine=name)
+
+    if isinstance(target.pool, QueuePool):
+        # Read through the engine: dispose() swaps in a new pool.
+        POOL_IN_USE.set_function(lambda: target.pool.checkedout(), engine=name)
+        POOL_IDLE.set_function(lambda: target.pool.checkedin(), engine=name)
+
+
+engine = _create_engine(SQLALCHEMY_DATABASE_URL)
+async_session = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+Base = declarative_base()
+
+
+class ReplicaRouter:
+    """Picks a read-replica engine per session.
+
+    `round_robin` cycles through replicas; `least_connections` picks the one
+    with the fewest checked-out connections (pooled mode only).
+    """
+
+    def __init__(self, engines: list[AsyncEngine], strategy: str = "round_robin"):
+        self.engines = engines
+        self.strategy = strategy
+        self._cycle = itertools.cycle(engines)
+
+    def choose(self) -> AsyncEngine:
+        if self.strategy == "least_connections" and not settings.DB_USE_NULL_POOL:
+            return min(self.engines, key=lambda e: e.pool.checkedout())
+        return next(self._cycle)
+
+
+class ReadYourWrites:
+    """Remembers which clients wrote recently so their reads stay on the primary.
+
+    Replicas lag the primary slightly; a client that just wrote and reads
+    back within `window` seconds is routed to the primary so it sees its own
+    write. At most `max_clients` are remembered: past that the client whose
+    last write is oldest is forgotten first, and its reads may go to a
+    replica before the window is up.
+    """
+
+    def __init__(self, window: float = 5.0, max_clients: int = 10000):
+        self.window = window
+        self.max_clients = max_clients
+        # Ordered by last write, oldest first.
+        self._last_write: OrderedDict[str, float] = OrderedDict()
+
+    def record_write(self, client_key: str) -> None:
+        now = time.monotonic()
+        self._last_write[client_key] = now
+        self._last_write.move_to_end(client_key)
+        while self._last_write:
+            oldest = next(iter(self._last_write.values()))
+            if len(self._last_write) <= self.max_clients and now - oldest < self.window:
+                break
+            self._last_write.popitem(last=False)
+
+    def is_sticky(self, client_key: str | None) -> bool:
+        if client_key is None:
+            return False
+        written_at = self._last_write.get(client_key)
+        return written_at is not None and time.monotonic() - written_at < self.window
+
+
+replica_router = (
+    ReplicaRouter(
+        [
+            _create_engine(url, f"replica-{index}")
+            for index, url in enumerate(settings.DATABASE_REPLICA_URLS)
+        ],
+        settings.DB_REPLICA_BALANCING,
+    )
+    if settings.DATABASE_REPLICA_URLS
+    else None
+)
+read_your_writes = ReadYourWrites(settings.DB_READ_YOUR_WRITES_SECONDS)
+
+
+def read_session(client_key: str | None = None) -> AsyncSession:
+    """Session for read-only work: a replica unless the client wrote recently"""
+    if replica_router is None or read_your_writes.is_sticky(client_key):
+        READ_ROUTING.inc(target="primary")
+        return async_session()
+    READ_ROUTING.inc(target="replica")
+    return async_session(bind=replica_router.choose(), info={"replica": True})
+
+
+def is_replica_session(db: AsyncSession) -> bool:
+    """Whether `db` reads from a replica, which may lag behind the primary"""
+    return db.info.get("replica", False)
+
+
+def row_dicts(result: Result) -> list[dict]:
+    """Materialize rows as plain dicts.
+
+    Pydantic validates dicts far faster than RowMapping or ORM instances,
+    which it has to read key by key or attribute by attribute.
+    """
+    keys = list(result.keys())
+    return [dict(zip(keys, row)) for row in result.all()]
+
+
+def get_pool_status() -> dict:
+    """Snapshot of the engine pools for diagnostics and metrics."""
+    status = _engine_pool_status(engine)
+    if replica_router is not None:
+        status["replicas"] = [_engine_pool_status(e) for e in replica_router.engines]
+    return status
+
+
+def _engine_pool_status(target: AsyncEngine) -> dict:
+    pool = target.pool
+    name = pool.logging_name
+    if isinstance(pool, NullPool):
+        return {
+            "engine": name,
+            "pool": "null",
+            "checkouts": POOL_CHECKOUTS.value(engine=name),
+        }
+    if not isinstance(pool, QueuePool):
+        return {
+            "engine": name,
+            "pool": "static",
+            "checkouts": POOL_CHECKOUTS.value(engine=name),
+        }
+    return {
+        "engine": name,
+        "pool": "queue",
+        "size": pool.size(),
+        "in_use": pool.checkedout(),
+        "idle": pool.checkedin(),
+        "overflow": pool.overflow(),
+        "checkouts": POOL_CHECKOUTS.value(engine=name),
+        "connects": POOL_CONNECTS.value(engine=name),
+        "timeouts": POOL_TIMEOUTS.value(engine=name),
+    }
+
+
+class LazySession:
+    """AsyncSession stand-in that defers creating the session until first use.
+
+    Requests that never touch the database (e.g. Auth0-authenticated calls
+    whose handlers return early) never build a session, and a connection is
+    only checked out on the first statement as usual. `release` closes the
+    underlying session so its connection goes back to the pool; objects
+    already loaded stay readable, and the next use starts a fresh session.
+    """
+
+    def __init__(self, session_factory=None, on_commit=None):
+        self._session_factory = session_factory or async_session
+        self._on_commit = on_commit
+        self._session: AsyncSession | None = None
+
+    @property
+    def session(self) -> AsyncSession:
+        if self._session is None:
+            self._session = self._session_factory()
+        return self._session
+
+    def __getattr__(self, name):
+        return getattr(self.session, name)
+
+    async def commit(self) -> None:
+        await self.session.commit()
+        if self._on_commit is not None:
+            self._on_commit()
+
+    async def release(self) -> None:
+        if self._session is not None:
+            session, self._session = self._session, None
             await session.close()
+
+    async def close(self) -> None:
+        await self.release()
+
+
+_request_session: ContextVar[LazySession | None] = ContextVar(
+    "request_session", default=None
+)
+_request_read_session: ContextVar[LazySession | None] = ContextVar(
+    "request_read_session", default=None
+)
+
+
+def _client_key(request: Request) -> str | None:
+    # Set by get_current_user once the caller is authenticated.
+    return getattr(request.state, "client_key", None)
+
+
+async def get_db(request: Request):
+    def on_commit():
+        client_key = _client_key(request)
+        if client_key is not None:
+            read_your_writes.record_write(client_key)
+
+    session = LazySession(on_commit=on_commit)
+    _request_session.set(session)
+    try:
+        yield session
+    finally:
+        await session.close()
+
+
+async def get_read_db(request: Request):
+    """Like get_db, but routed to a read replica when one is configured.
+
+    The target is picked on first use, after authentication has identified
+    the client, so read-your-writes stickiness can be applied.
+    """
+    session = LazySession(lambda: read_session(_client_key(request)))
+    _request_read_session.set(session)
+    try:
+        yield session
+    finally:
+        await session.close()
+
+
+async def release_request_session() -> None:
+    """Return the current request's connections to the pool, if it holds any"""
+    for context_var in (_request_session, _request_read_session):
+        session = context_var.get()
+        if session is not None:
+            await session.release()
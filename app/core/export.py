@@ -0,0 +1,62 @@
+import csv
+import io
+import json
+from typing import AsyncIterator, Literal, Mapping, Sequence
+
+from fastapi.responses import StreamingResponse
+
+ExportFormat = Literal["ndjson", "csv"]
+
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+# Rows are grouped so each ASGI send carries a reasonably sized chunk.
+ROWS_PER_CHUNK = 500
+
+
+async def _ndjson_chunks(rows: AsyncIterator[Mapping]) -> AsyncIterator[str]:
+    lines = []
+    async for row in rows:
+        lines.append(json.dumps(dict(row)))
+        if len(lines) >= ROWS_PER_CHUNK:
+            yield "\n".join(lines) + "\n"
+            lines = []
+    if lines:
+        yield "\n".join(lines) + "\n"
+
+
+async def _csv_chunks(
+    rows: AsyncIterator[Mapping], columns: Sequence[str]
+) -> AsyncIterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    pending = 0
+    async for row in rows:
+        writer.writerow([row[column] for column in columns])
+        pending += 1
+        if pending >= ROWS_PER_CHUNK:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            pending = 0
+    yield buffer.getvalue()
+
+
+def export_response(
+    rows: AsyncIterator[Mapping],
+    export_format: ExportFormat,
+    columns: Sequence[str],
+    filename: str,
+) -> StreamingResponse:
+    """Stream `rows` as NDJSON or CSV without materializing them in memory"""
+    if export_format == "csv":
+        body = _csv_chunks(rows, columns)
+    else:
+        body = _ndjson_chunks(rows)
+    return StreamingResponse(
+        body,
+        media_type=MEDIA_TYPES[export_format],
+        headers={
+            "Content-Disposition": f'attachment; filename="{filename}.{export_format}"'
+        },
+    )
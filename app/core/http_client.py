@@ -0,0 +1,103 @@
+import time
+
+import httpx
+
+from app.core.config import settings
+from app.core.metrics import registry
+
+OUTBOUND_REQUESTS = registry.counter(
+    "http_client_requests_total", "Outbound HTTP requests", ["host", "status"]
+)
+OUTBOUND_SECONDS = registry.histogram(
+    "http_client_request_seconds",
+    "Outbound HTTP time until response headers arrive",
+    ["host"],
+)
+OUTBOUND_CONNECTIONS = registry.counter(
+    "http_client_connections_total",
+    "New outbound TCP connections and TLS handshakes",
+    ["host", "stage"],
+)
+
+_CONNECTION_EVENTS = {
+    "connection.connect_tcp.complete": "tcp",
+    "connection.start_tls.complete": "tls",
+}
+
+
+class InstrumentedTransport(httpx.AsyncBaseTransport):
+    """Transport wrapper recording request outcomes and new connections.
+
+    Reused keep-alive connections do not emit connect events, so a low
+    connections-to-requests ratio means pooling is working.
+    """
+
+    def __init__(self, transport: httpx.AsyncBaseTransport):
+        self._transport = transport
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        host = request.url.host
+
+        async def trace(event_name: str, info: dict) -> None:
+            stage = _CONNECTION_EVENTS.get(event_name)
+            if stage is not None:
+                OUTBOUND_CONNECTIONS.inc(host=host, stage=stage)
+
+        request.extensions = {**request.extensions, "trace": trace}
+        start = time.perf_counter()
+        try:
+            response = await self._transport.handle_async_request(request)
+        except Exception:
+            OUTBOUND_REQUESTS.inc(host=host, status="error")
+            raise
+        finally:
+            OUTBOUND_SECONDS.observe(time.perf_counter() - start, host=host)
+        OUTBOUND_REQUESTS.inc(host=host, status=str(response.status_code))
+        return response
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+
+def _build_client(
+    transport: httpx.AsyncBaseTransport | None = None,
+) -> httpx.AsyncClient:
+    limits = httpx.Limits(
+        max_connections=settings.HTTP_CLIENT_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.HTTP_CLIENT_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=settings.HTTP_CLIENT_KEEPALIVE_EXPIRY,
+    )
+    if transport is None:
+        transport = httpx.AsyncHTTPTransport(limits=limits)
+    return httpx.AsyncClient(
+        transport=InstrumentedTransport(transport),
+        timeout=httpx.Timeout(
+            settings.HTTP_CLIENT_TIMEOUT,
+            connect=settings.HTTP_CLIENT_CONNECT_TIMEOUT,
+        ),
+    )
+
+
+_client: httpx.AsyncClient | None = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Shared client for all outbound calls; created on first use"""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = _build_client()
+    return _client
+
+
+async def use_transport(transport: httpx.AsyncBaseTransport) -> None:
+    """Route outbound calls through `transport`, e.g. an httpx.MockTransport"""
+    global _client
+    await close_http_client()
+    _client = _build_client(transport)
+
+
+async def close_http_client() -> None:
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
@@ -0,0 +1,146 @@
+import base64
+import logging
+import time
+from typing import Dict
+
+from cryptography.hazmat.backends import default_backend
+from cryptography.hazmat.primitives.asymmetric import rsa
+
+from app.core.config import settings
+from app.core.http_client import get_http_client
+from app.core.metrics import registry
+from app.core.singleflight import BackgroundRefresh
+
+logger = logging.getLogger(__name__)
+
+JWKS_FETCHES = registry.counter(
+    "jwks_fetches_total", "JWKS document fetches by outcome", ["result"]
+)
+JWKS_LOOKUPS = registry.counter(
+    "jwks_key_lookups_total", "Signing key lookups by outcome", ["result"]
+)
+
+MAX_UNKNOWN_KIDS = 1024
+
+
+class JWKSFetchError(Exception):
+    """Raised when the JWKS document cannot be fetched and nothing is cached."""
+
+
+def _b64_to_int(value: str) -> int:
+    return int.from_bytes(base64.urlsafe_b64decode(value + "=="), "big")
+
+
+def rsa_key_from_jwk(jwk: dict) -> rsa.RSAPublicKey:
+    """Construct an RSA public key from the `n`/`e` members of a JWK"""
+    public_numbers = rsa.RSAPublicNumbers(_b64_to_int(jwk["e"]), _b64_to_int(jwk["n"]))
+    return public_numbers.public_key(default_backend())
+
+
+class JWKSKeyStore:
+    """In-process cache of Auth0 signing keys indexed by `kid`.
+
+    Keys are fetched once and served from memory until `ttl` expires. Shortly
+    before expiry a background refresh is started so that lookups never wait
+    on the network while a valid key set is cached. An unknown `kid` triggers
+    at most one forced refetch per `unknown_kid_cooldown` seconds, and the kid
+    is negatively cached so a flood of bogus tokens cannot hammer Auth0.
+    Concurrent refreshes are collapsed into a single fetch.
+    """
+
+    def __init__(
+        self,
+        jwks_url: str,
+        ttl: float = 3600,
+        refresh_ahead: float = 300,
+        unknown_kid_cooldown: float = 30,
+    ):
+        self.jwks_url = jwks_url
+        self.ttl = ttl
+        self.refresh_ahead = min(refresh_ahead, ttl)
+        self.unknown_kid_cooldown = unknown_kid_cooldown
+        self._keys: Dict[str, rsa.RSAPublicKey] = {}
+        self._expires_at = 0.0
+        self._last_forced_refresh = float("-inf")
+        self._unknown_kids: Dict[str, float] = {}
+        self._refresher = BackgroundRefresh(self._do_refresh)
+
+    async def _fetch(self) -> dict:
+        response = await get_http_client().get(self.jwks_url)
+        response.raise_for_status()
+        return response.json()
+
+    async def _do_refresh(self) -> None:
+        try:
+            jwks = await self._fetch()
+            keys = {
+                jwk["kid"]: rsa_key_from_jwk(jwk)
+                for jwk in jwks["keys"]
+                if jwk.get("kty", "RSA") == "RSA" and "kid" in jwk
+            }
+        except Exception as e:
+            JWKS_FETCHES.inc(result="error")
+            if not self._keys:
+                raise JWKSFetchError(str(e)) from e
+            # Keep serving the previous key set; retry on the next lookup.
+            logger.warning("JWKS refresh failed, serving cached keys: %s", e)
+            self._expires_at = time.monotonic() + self.unknown_kid_cooldown
+            return
+
+        JWKS_FETCHES.inc(result="ok")
+        self._keys = keys
+        self._expires_at = time.monotonic() + self.ttl
+        self._unknown_kids = {
+            kid: until for kid, until in self._unknown_kids.items() if kid not in keys
+        }
+
+    async def refresh(self) -> None:
+        """Refetch the key set, joining any refresh already in flight."""
+        await self._refresher.run()
+
+    async def get_key(self, kid: str) -> rsa.RSAPublicKey | None:
+        """Return the signing key for `kid`, or None if Auth0 does not know it."""
+        now = time.monotonic()
+        if now >= self._expires_at:
+            await self.refresh()
+        elif now >= self._expires_at - self.refresh_ahead:
+            self._refresher.start()
+
+        key = self._keys.get(kid)
+        if key is not None:
+            JWKS_LOOKUPS.inc(result="hit")
+            return key
+
+        now = time.monotonic()
+        if self._unknown_kids.get(kid, 0.0) > now:
+            JWKS_LOOKUPS.inc(result="negative")
+            return None
+
+        if now - self._last_forced_refresh >= self.unknown_kid_cooldown:
+            # Auth0 may have rotated keys: refetch once before rejecting.
+            self._last_forced_refresh = now
+            await self.refresh()
+            key = self._keys.get(kid)
+            if key is not None:
+                JWKS_LOOKUPS.inc(result="hit")
+                return key
+
+        JWKS_LOOKUPS.inc(result="miss")
+        if len(self._unknown_kids) >= MAX_UNKNOWN_KIDS:
+            self._unknown_kids.clear()
+        self._unknown_kids[kid] = time.monotonic() + self.unknown_kid_cooldown
+        return None
+
+    def clear(self) -> None:
+        self._keys = {}
+        self._expires_at = 0.0
+        self._last_forced_refresh = float("-inf")
+        self._unknown_kids = {}
+
+
+jwks_store = JWKSKeyStore(
+    settings.JWKS_URL,
+    ttl=settings.JWKS_CACHE_TTL_SECONDS,
+    refresh_ahead=settings.JWKS_REFRESH_AHEAD_SECONDS,
+    unknown_kid_cooldown=settings.JWKS_UNKNOWN_KID_COOLDOWN_SECONDS,
+)
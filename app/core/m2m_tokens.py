@@ -0,0 +1,102 @@
+import asyncio
+import time
+from typing import Awaitable, Callable, Dict, Protocol
+
+from app.core.config import settings
+from app.core.metrics import registry
+
+M2M_TOKEN_LOOKUPS = registry.counter(
+    "m2m_token_cache_lookups_total",
+    "M2M client-credentials token lookups",
+    ["result"],
+)
+
+
+class M2MTokenBackend(Protocol):
+    """Storage for cached token responses.
+
+    Implement this over a shared store (e.g. Redis) to reuse tokens across
+    workers; values are plain JSON-serializable dicts.
+    """
+
+    async def get(self, key: str) -> dict | None: ...
+
+    async def set(self, key: str, value: dict, ttl: float) -> None: ...
+
+
+class InMemoryM2MTokenBackend:
+    def __init__(self):
+        self._entries: Dict[str, tuple[dict, float]] = {}
+
+    async def get(self, key: str) -> dict | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at <= time.time():
+            del self._entries[key]
+            return None
+        return value
+
+    async def set(self, key: str, value: dict, ttl: float) -> None:
+        self._entries[key] = (value, time.time() + ttl)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+class M2MTokenCache:
+    """Reuse Auth0 client-credentials tokens until shortly before they expire.
+
+    Tokens are stored with a TTL of `expires_in - safety_margin` so callers
+    never receive one that is about to lapse, and concurrent misses for the
+    same key share a single upstream request.
+    """
+
+    def __init__(self, backend: M2MTokenBackend, safety_margin: float = 120):
+        self.backend = backend
+        self.safety_margin = safety_margin
+        self._in_flight: Dict[str, asyncio.Task] = {}
+
+    async def get_or_fetch(
+        self, key: str, fetch: Callable[[], Awaitable[dict]]
+    ) -> dict:
+        cached = await self.backend.get(key)
+        if cached is not None:
+            M2M_TOKEN_LOOKUPS.inc(result="hit")
+            return self._response(cached)
+
+        task = self._in_flight.get(key)
+        if task is not None:
+            M2M_TOKEN_LOOKUPS.inc(result="coalesced")
+        else:
+            M2M_TOKEN_LOOKUPS.inc(result="miss")
+            task = asyncio.create_task(self._fetch_and_store(key, fetch))
+            self._in_flight[key] = task
+            task.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        return self._response(await asyncio.shield(task))
+
+    async def _fetch_and_store(
+        self, key: str, fetch: Callable[[], Awaitable[dict]]
+    ) -> dict:
+        token = await fetch()
+        expires_in = token.get("expires_in", 0)
+        entry = {"token": token, "expires_at": time.time() + expires_in}
+        ttl = expires_in - self.safety_margin
+        if ttl > 0:
+            await self.backend.set(key, entry, ttl)
+        return entry
+
+    @staticmethod
+    def _response(entry: dict) -> dict:
+        # Report the remaining lifetime rather than the one Auth0 issued.
+        token = dict(entry["token"])
+        if "expires_in" in token:
+            token["expires_in"] = max(int(entry["expires_at"] - time.time()), 0)
+        return token
+
+
+m2m_token_cache = M2MTokenCache(
+    InMemoryM2MTokenBackend(),
+    safety_margin=settings.M2M_TOKEN_CACHE_MARGIN_SECONDS,
+)
@@ -0,0 +1,62 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from passlib.context import CryptContext
+
+from app.core.config import settings
+from app.core.metrics import registry
+from app.core.timing import record
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+PASSWORD_HASH_QUEUE_DEPTH = registry.gauge(
+    "password_hash_queue_depth", "Hash/verify calls waiting for a worker"
+)
+PASSWORD_HASH_IN_PROGRESS = registry.gauge(
+    "password_hash_in_progress", "Hash/verify calls currently running"
+)
+PASSWORD_HASH_WAIT_SECONDS = registry.histogram(
+    "password_hash_wait_seconds", "Time spent queued before hashing started"
+)
+PASSWORD_HASH_SECONDS = registry.histogram(
+    "password_hash_seconds", "Time spent hashing or verifying", ["operation"]
+)
+
+# bcrypt releases the GIL while it works, so a small thread pool gives real
+# parallelism without the pickling overhead of a process pool.
+_executor = ThreadPoolExecutor(
+    max_workers=settings.PASSWORD_HASH_WORKERS, thread_name_prefix="bcrypt"
+)
+_slots = asyncio.Semaphore(settings.PASSWORD_HASH_WORKERS)
+
+
+async def _run(operation: str, func, *args):
+    """Run a bcrypt call on the worker pool without blocking the event loop."""
+    queued_at = time.perf_counter()
+    PASSWORD_HASH_QUEUE_DEPTH.inc()
+    try:
+        await _slots.acquire()
+    finally:
+        PASSWORD_HASH_QUEUE_DEPTH.dec()
+
+    started_at = time.perf_counter()
+    PASSWORD_HASH_WAIT_SECONDS.observe(started_at - queued_at)
+    PASSWORD_HASH_IN_PROGRESS.inc()
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_executor, func, *args)
+    finally:
+        PASSWORD_HASH_IN_PROGRESS.dec()
+        finished_at = time.perf_counter()
+        PASSWORD_HASH_SECONDS.observe(finished_at - started_at, operation=operation)
+        record("bcrypt", finished_at - queued_at, operation)
+        _slots.release()
+
+
+async def get_password_hash(password: str) -> str:
+    return await _run("hash", pwd_context.hash, password)
+
+
+async def verify_password(plain_password: str, hashed_password: str) -> bool:
+    return await _run("verify", pwd_context.verify, plain_password, hashed_password)
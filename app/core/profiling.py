@@ -0,0 +1,156 @@
+"""On-demand profiling of a live worker.
+
+Two profilers, for two questions:
+
+- `sample_stacks` polls every thread's stack from a background thread and
+  returns flamegraph-ready collapsed stacks ("a;b;c 42"). It adds no
+  overhead to the code being sampled and keeps working when the event loop
+  is pegged, which is also why SIGUSR1 (see `install_signal_handler`) uses it.
+- `loop_profile` runs cProfile, which traces every call. It is exact but
+  slows the worker down, and only one can be active at a time in the
+  process; it backs the pstats download and per-request profiling.
+"""
+
+import cProfile
+import io
+import itertools
+import logging
+import marshal
+import os
+import pstats
+import signal
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter, OrderedDict
+from contextlib import contextmanager
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class ProfilerBusy(Exception):
+    """Another cProfile session is already running in this process"""
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_qualname} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def sample_stacks(seconds: float, interval: float = 0.005) -> str:
+    """Sample all other threads for `seconds`; blocks the calling thread"""
+    own = threading.get_ident()
+    names = {thread.ident: thread.name for thread in threading.enumerate()}
+    counts: Counter = Counter()
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == own:
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(_frame_label(frame))
+                frame = frame.f_back
+            stack.append(names.get(thread_id, str(thread_id)))
+            counts[";".join(reversed(stack))] += 1
+        time.sleep(interval)
+    return "".join(f"{stack} {count}\n" for stack, count in counts.most_common())
+
+
+_cprofile_active = False
+
+
+def cprofile_active() -> bool:
+    return _cprofile_active
+
+
+@contextmanager
+def loop_profile():
+    """cProfile the calling thread (the event loop) for the duration of the block.
+
+    Every task the loop runs meanwhile shows up in the result, not just the
+    code inside the block.
+    """
+    global _cprofile_active
+    if _cprofile_active:
+        raise ProfilerBusy()
+    _cprofile_active = True
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError as e:  # enabled outside this module, e.g. by a debugger
+        _cprofile_active = False
+        raise ProfilerBusy() from e
+    try:
+        yield profiler
+    finally:
+        profiler.disable()
+        _cprofile_active = False
+
+
+def pstats_dump(profiler: cProfile.Profile) -> bytes:
+    """The profile in the `.prof` format written by `Profile.dump_stats`"""
+    profiler.create_stats()
+    return marshal.dumps(profiler.stats)
+
+
+def pstats_text(profiler: cProfile.Profile, limit: int = 50) -> str:
+    out = io.StringIO()
+    pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(limit)
+    return out.getvalue()
+
+
+class RequestProfiles:
+    """The most recent per-request profiles, kept for the admin endpoint"""
+
+    def __init__(self, max_entries: int = 20):
+        self.max_entries = max_entries
+        self._ids = itertools.count(1)
+        self._profiles: OrderedDict[int, cProfile.Profile] = OrderedDict()
+
+    def next_id(self) -> int:
+        return next(self._ids)
+
+    def store(self, profile_id: int, profiler: cProfile.Profile) -> None:
+        self._profiles[profile_id] = profiler
+        while len(self._profiles) > self.max_entries:
+            self._profiles.popitem(last=False)
+
+    def get(self, profile_id: int) -> cProfile.Profile | None:
+        return self._profiles.get(profile_id)
+
+
+request_profiles = RequestProfiles(settings.PROFILE_REQUEST_HISTORY)
+
+
+def _sample_to_file(seconds: float) -> None:
+    path = os.path.join(
+        settings.PROFILE_OUTPUT_DIR or tempfile.gettempdir(),
+        f"profile-{os.getpid()}-{int(time.time())}.collapsed",
+    )
+    with open(path, "w") as f:
+        f.write(sample_stacks(seconds))
+    logger.warning("wrote %gs of stack samples to %s", seconds, path)
+
+
+def install_signal_handler() -> None:
+    """On SIGUSR1, sample stacks for PROFILE_SIGNAL_SECONDS into a file"""
+
+    def handler(signum, frame):
+        threading.Thread(
+            target=_sample_to_file,
+            args=(settings.PROFILE_SIGNAL_SECONDS,),
+            name="stack-sampler",
+            daemon=True,
+        ).start()
+
+    # Handlers can only be installed from the main thread, and SIGUSR1 does
+    # not exist on Windows.
+    if (
+        hasattr(signal, "SIGUSR1")
+        and threading.current_thread() is threading.main_thread()
+    ):
+        signal.signal(signal.SIGUSR1, handler)
@@ -0,0 +1,113 @@
+"""Statement counts and durations per service method.
+
+Service classes decorated with `instrument_service` tag the statements they
+run with `Class.method`; cursor events on each engine time every statement
+under that label, or under "other" outside a service method. Statements run
+during a sampled request are also added to its "db" timing phase, and every
+statement feeds the per-fingerprint table in `statement_stats`.
+"""
+
+import functools
+import inspect
+import time
+from contextvars import ContextVar
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+from app.core.metrics import registry
+from app.core.statement_stats import row_count, statement_stats
+from app.core.timing import record
+
+DB_QUERY_SECONDS = registry.histogram(
+    "db_query_duration_seconds",
+    "Statement execution time by service method",
+    ["operation"],
+)
+DB_QUERY_ERRORS = registry.counter(
+    "db_query_errors_total", "Statements that raised, by service method", ["operation"]
+)
+
+_operation: ContextVar[str] = ContextVar("db_operation", default="other")
+
+
+def current_operation() -> str:
+    return _operation.get()
+
+
+def _wrap_coroutine(fn, label: str):
+    @functools.wraps(fn)
+    async def wrapper(*args, **kwargs):
+        token = _operation.set(label)
+        try:
+            return await fn(*args, **kwargs)
+        finally:
+            _operation.reset(token)
+
+    return wrapper
+
+
+def _wrap_async_gen(fn, label: str):
+    # The label is only set while the generator runs, not while it is
+    # suspended at a yield, so it does not leak into the consumer.
+    @functools.wraps(fn)
+    async def wrapper(*args, **kwargs):
+        generator = fn(*args, **kwargs)
+        try:
+            while True:
+                token = _operation.set(label)
+                try:
+                    item = await anext(generator)
+                except StopAsyncIteration:
+                    return
+                finally:
+                    _operation.reset(token)
+                yield item
+        finally:
+            await generator.aclose()
+
+    return wrapper
+
+
+def instrument_service(cls):
+    """Label the statements run by each async static method of a service class"""
+    for name, attr in list(vars(cls).items()):
+        if not isinstance(attr, staticmethod):
+            continue
+        label = f"{cls.__name__}.{name}"
+        if inspect.isasyncgenfunction(attr.__func__):
+            setattr(cls, name, staticmethod(_wrap_async_gen(attr.__func__, label)))
+        elif inspect.iscoroutinefunction(attr.__func__):
+            setattr(cls, name, staticmethod(_wrap_coroutine(attr.__func__, label)))
+    return cls
+
+
+def attach_query_metrics(sync_engine: Engine) -> None:
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(sync_engine, "handle_error", _handle_error)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # Kept on the per-statement context: connection-level state is shared by
+    # everything using a StaticPool connection.
+    context._query_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - context._query_started
+    operation = _operation.get()
+    DB_QUERY_SECONDS.observe(elapsed, operation=operation)
+    record("db", elapsed, operation)
+    if settings.STATEMENT_STATS_ENABLED:
+        statement_stats.observe(
+            statement, parameters, elapsed, row_count(cursor), operation
+        )
+
+
+def _handle_error(exception_context):
+    operation = _operation.get()
+    DB_QUERY_ERRORS.inc(operation=operation)
+    if settings.STATEMENT_STATS_ENABLED and exception_context.statement:
+        statement_stats.observe_error(exception_context.statement, operation)
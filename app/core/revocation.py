@@ -0,0 +1,134 @@
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict
+
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.core.database import async_session
+from app.core.metrics import registry
+from app.core.singleflight import BackgroundRefresh
+from app.models.user import User
+
+logger = logging.getLogger(__name__)
+
+REVOCATION_REFRESHES = registry.counter(
+    "token_revocation_refreshes_total",
+    "Reloads of the token-version map from the database",
+    ["result"],
+)
+REVOKED_TOKENS = registry.counter(
+    "token_revocation_rejections_total", "Local tokens rejected as revoked"
+)
+
+# Bumps are stamped with their transaction's start time (now() on Postgres),
+# so one can commit after a later-stamped bump has already been read. Each
+# refresh re-reads this far back to pick those up.
+REFRESH_OVERLAP_SECONDS = 120
+
+
+def _as_utc(value: datetime) -> datetime:
+    # SQLite hands back naive datetimes; they are UTC like CURRENT_TIMESTAMP.
+    return value if value.tzinfo is not None else value.replace(tzinfo=timezone.utc)
+
+
+class TokenRevocations:
+    """Per-user minimum token version, used to verify local tokens statelessly.
+
+    Local tokens carry the user's `token_version` at issue time in the `ver`
+    claim. Bumping a user's version in the database revokes every older
+    token. A token older than the bump expires at most `token_lifetime`
+    seconds after it, so only bumps made within that window are kept in
+    memory. The map is refreshed in the background every `refresh_interval`
+    seconds so bumps made by other workers are picked up; each refresh only
+    reads bumps stamped since the newest one it has seen, through the
+    partial index on `token_revoked_at`. Changes made by this process apply
+    immediately. Users deleted by this process are likewise remembered only
+    for `token_lifetime` seconds.
+    """
+
+    def __init__(self, refresh_interval: float = 30, token_lifetime: float = 1800):
+        self.refresh_interval = refresh_interval
+        self.token_lifetime = token_lifetime
+        # user id -> (minimum version, bumped at)
+        self._versions: Dict[int, tuple[int, datetime]] = {}
+        self._deleted: Dict[int, float] = {}  # user id -> deleted at
+        self._seen_until: datetime | None = None  # newest bump read so far
+        self._loaded_at: float | None = None
+        self._refresher = BackgroundRefresh(self._do_refresh)
+
+    async def _do_refresh(self) -> None:
+        horizon = datetime.now(timezone.utc) - timedelta(seconds=self.token_lifetime)
+        since = horizon
+        if self._seen_until is not None:
+            overlap = timedelta(seconds=REFRESH_OVERLAP_SECONDS)
+            since = max(horizon, self._seen_until - overlap)
+        try:
+            async with async_session() as db:
+                result = await db.execute(
+                    select(User.id, User.token_version, User.token_revoked_at).where(
+                        User.token_version > 0, User.token_revoked_at > since
+                    )
+                )
+                rows = result.all()
+        except Exception:
+            REVOCATION_REFRESHES.inc(result="error")
+            if self._loaded_at is None:
+                raise
+            logger.exception("Token revocation refresh failed, keeping old map")
+            return
+
+        REVOCATION_REFRESHES.inc(result="ok")
+        # Built from the current map, so bumps made locally while the query
+        # ran are kept; a version is never lowered.
+        versions = {
+            user_id: entry
+            for user_id, entry in self._versions.items()
+            if entry[1] > horizon
+        }
+        for user_id, version, revoked_at in rows:
+            revoked_at = _as_utc(revoked_at)
+            if self._seen_until is None or revoked_at > self._seen_until:
+                self._seen_until = revoked_at
+            current = versions.get(user_id)
+            if current is None or version > current[0]:
+                versions[user_id] = (version, revoked_at)
+        self._versions = versions
+        self._loaded_at = time.monotonic()
+        self._deleted = {
+            user_id: deleted_at
+            for user_id, deleted_at in self._deleted.items()
+            if self._loaded_at - deleted_at < self.token_lifetime
+        }
+
+    async def is_revoked(self, user_id: int, token_version: int) -> bool:
+        if self._loaded_at is None:
+            await self._refresher.run()
+        elif time.monotonic() - self._loaded_at >= self.refresh_interval:
+            self._refresher.start()
+
+        entry = self._versions.get(user_id)
+        revoked = user_id in self._deleted or (
+            entry is not None and token_version < entry[0]
+        )
+        if revoked:
+            REVOKED_TOKENS.inc()
+        return revoked
+
+    def set_version(self, user_id: int, token_version: int) -> None:
+        """Record a version bump made by this process"""
+        entry = self._versions.get(user_id)
+        if entry is None or token_version > entry[0]:
+            self._versions[user_id] = (token_version, datetime.now(timezone.utc))
+
+    def mark_deleted(self, user_id: int) -> None:
+        """Reject all tokens of a user deleted by this process"""
+        self._deleted[user_id] = time.monotonic()
+        self._versions.pop(user_id, None)
+
+
+token_revocations = TokenRevocations(
+    refresh_interval=settings.TOKEN_REVOCATION_REFRESH_SECONDS,
+    token_lifetime=settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+)
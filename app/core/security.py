@@ -1,20 +1,21 @@
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import (
     HTTPBearer,
     HTTPAuthorizationCredentials,
     OAuth2PasswordBearer,
 )
+import time
 from typing import Dict
 from datetime import datetime, timedelta
-import httpx
-from passlib.context import CryptContext
 from sqlalchemy.ext.asyncio import AsyncSession
-from cryptography.hazmat.primitives.asymmetric import rsa
-from cryptography.hazmat.backends import default_backend
-import base64
 
 from app.core.config import settings
 from app.core.database import get_db
+from app.core.jwks import jwks_store
+from app.core.metrics import registry
+from app.core.revocation import token_revocations
+from app.core.timing import timed
+from app.core.token_cache import token_cache
 from app.services.user_service import UserService
 from jwt.exceptions import InvalidTokenError
 import jwt
@@ -22,13 +23,17 @@ import jwt
 AUTH0_DOMAIN = settings.AUTH0_DOMAIN
 AUTH0_API_AUDIENCE = settings.AUTH0_API_AUDIENCE
 AUTH0_ALGORITHMS = settings.AUTH0_ALGORITHMS
-JWKS_URL = settings.JWKS_URL
 SECRET_KEY = settings.SECRET_KEY
 ALGORITHM = settings.ALGORITHM
 ACCESS_TOKEN_EXPIRE_MINUTES = settings.ACCESS_TOKEN_EXPIRE_MINUTES
 
+TOKEN_VERIFICATION_SECONDS = registry.histogram(
+    "token_verification_seconds",
+    "Verification of tokens missing from the token cache, by issuer",
+    ["issuer", "result"],
+)
+
 security = HTTPBearer()
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
 
@@ -45,41 +50,25 @@ def create_access_token(data: dict, expires_delta: timedelta | None = None) -> s
     return encoded_jwt
 
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
-
-
-def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
-
-
 async def get_auth0_public_key(token: str):
-    """Fetch Auth0 public key from JWKS endpoint and properly construct RSA key"""
-    async with httpx.AsyncClient() as client:
-        try:
-            jwks_response = await client.get(JWKS_URL)
-            jwks = jwks_response.json()
-
-            unverified_header = jwt.get_unverified_header(token)
-
-            for key in jwks["keys"]:
-                if key["kid"] == unverified_header["kid"]:
-                    n = int.from_bytes(base64.urlsafe_b64decode(key["n"] + "=="), "big")
-                    e = int.from_bytes(base64.urlsafe_b64decode(key["e"] + "=="), "big")
-                    public_numbers = rsa.RSAPublicNumbers(e, n)
-                    return public_numbers.public_key(default_backend())
+    """Look up the Auth0 signing key for the token's `kid` in the JWKS cache"""
+    try:
+        unverified_header = jwt.get_unverified_header(token)
+        rsa_key = await jwks_store.get_key(unverified_header["kid"])
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Failed to fetch JWKS",
+            headers={"WWW-Authenticate": "Bearer"},
+        ) from e
 
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Unable to find matching JWK",
-                headers={"WWW-Authenticate": "Bearer"},
-            )
-        except Exception as e:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Failed to fetch JWKS",
-                headers={"WWW-Authenticate": "Bearer"},
-            ) from e
+    if rsa_key is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Unable to find matching JWK",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return rsa_key
 
 
 async def verify_auth0_token(token: str) -> dict:
@@ -116,66 +105,146 @@ async def verify_local_token(token: str) -> Dict:
         ) from e
 
 
-async def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: AsyncSession = Depends(get_db),
-) -> Dict:
-    """
-    Returns:
-    - For M2M: {'is_m2m': True, 'client_id': '...', 'scope': '...'}
-    - For users: {'id': '...', 'email': '...', 'is_m2m': False}
-    """
-    token = credentials.credentials
+async def _resolve_local_principal(
+    payload: Dict, db: AsyncSession
+) -> tuple[Dict, int | None]:
+    user_id: str = payload.get("sub")
+    if user_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+    # Convert user_id to integer since that's what our database expects
     try:
-        payload = jwt.decode(
-            token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
+        user_id_int = int(user_id)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid user ID format",
+            headers={"WWW-Authenticate": "Bearer"},
         )
-        user_id: str = payload.get("sub")
-        if user_id is None:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid token",
-                headers={"WWW-Authenticate": "Bearer"},
-            )
 
-        # Convert user_id to integer since that's what our database expects
-        try:
-            user_id_int = int(user_id)
-        except ValueError:
+    token_version = payload.get("ver")
+    if settings.LOCAL_TOKEN_STATELESS and isinstance(token_version, int):
+        # Claims are signed by us; only revocation needs checking.
+        if await token_revocations.is_revoked(user_id_int, token_version):
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid user ID format",
+                detail="Token revoked",
                 headers={"WWW-Authenticate": "Bearer"},
             )
+        principal = {
+            "id": user_id_int,
+            "email": payload.get("email"),
+            "is_m2m": False,
+            "token_version": token_version,
+        }
+        return principal, payload.get("exp")
 
-        user = await UserService.get_user(db, user_id_int)
-        if user is None:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="User not found",
-                headers={"WWW-Authenticate": "Bearer"},
-            )
-        return {"id": user.id, "email": user.email, "is_m2m": False}
-    except InvalidTokenError:
-        try:
-            payload = await verify_auth0_token(token)
-            if payload.get("gty") == "client-credentials":
-                return {
-                    "is_m2m": True,
-                    "client_id": payload.get("sub"),
-                    "scope": payload.get("scope", ""),
-                }
-            return {
+    user = await UserService.get_user(db, user_id_int)
+    if user is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="User not found",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    if isinstance(token_version, int) and token_version < user.token_version:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token revoked",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    principal = {"id": user.id, "email": user.email, "is_m2m": False}
+    if isinstance(token_version, int):
+        # Lets get_current_user re-check revocation on token cache hits.
+        principal["token_version"] = token_version
+    return principal, payload.get("exp")
+
+
+async def _resolve_auth0_principal(token: str) -> tuple[Dict, int | None]:
+    try:
+        payload = await verify_auth0_token(token)
+        if payload.get("gty") == "client-credentials":
+            principal = {
+                "is_m2m": True,
+                "client_id": payload.get("sub"),
+                "scope": payload.get("scope", ""),
+            }
+        else:
+            principal = {
                 "id": payload["sub"],
                 "email": payload.get("email"),
                 "is_m2m": False,
             }
-        except Exception as e:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid token",
-                headers={"WWW-Authenticate": "Bearer"},
-            ) from e
+        return principal, payload.get("exp")
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid token",
+            headers={"WWW-Authenticate": "Bearer"},
+        ) from e
+
+
+async def _resolve_principal(token: str, db: AsyncSession) -> tuple[Dict, int | None]:
+    """Verify the token and return the principal along with the token's `exp`"""
+    start = time.perf_counter()
+    issuer, result = "local", "rejected"
+    try:
+        try:
+            payload = jwt.decode(
+                token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
+            )
+        except InvalidTokenError:
+            issuer = "auth0"
+            resolved = await _resolve_auth0_principal(token)
+        else:
+            resolved = await _resolve_local_principal(payload, db)
+        result = "ok"
+        return resolved
+    finally:
+        TOKEN_VERIFICATION_SECONDS.observe(
+            time.perf_counter() - start, issuer=issuer, result=result
+        )
+
+
+def client_key(principal: Dict) -> str:
+    """Stable identifier of the caller: user id or M2M client id"""
+    return str(principal.get("id") or principal["client_id"])
+
+
+async def _is_revoked(principal: Dict) -> bool:
+    token_version = principal.get("token_version")
+    if token_version is None:
+        return False
+    return await token_revocations.is_revoked(principal["id"], token_version)
+
+
+async def get_current_user(
+    request: Request,
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: AsyncSession = Depends(get_db),
+) -> Dict:
+    """
+    Returns:
+    - For M2M: {'is_m2m': True, 'client_id': '...', 'scope': '...'}
+    - For users: {'id': '...', 'email': '...', 'is_m2m': False}
+
+    Verified tokens are cached until their `exp`, so repeat requests with the
+    same bearer token skip signature verification and the user lookup.
+    """
+    token = credentials.credentials
+    with timed("auth"):
+        principal = token_cache.get(token)
+        if principal is None or await _is_revoked(principal):
+            principal, expires_at = await _resolve_principal(token, db)
+            if expires_at is not None:
+                token_cache.set(token, principal, expires_at)
+
+    # Lets the DB layer keep this client's reads on the primary after a write.
+    request.state.client_key = client_key(principal)
+    return principal
 
 
 def check_authorization(
@@ -195,3 +264,45 @@ def check_authorization(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Not enough permissions",
         )
+
+
+def owner_id_of(current_user: dict) -> int:
+    """The user's id as stored in `owner_id` columns.
+
+    Only local users own rows; Auth0 users have string ids (`auth0|...`)
+    that can never match an integer owner, so they are refused up front
+    rather than compared in SQL.
+    """
+    user_id = current_user["id"]
+    if not isinstance(user_id, int):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions",
+        )
+    return user_id
+
+
+def authorized_owner_id(current_user: dict, required_scope: str) -> int | None:
+    """Owner a write must be restricted to, or None when M2M scope allows any row.
+
+    Lets services enforce ownership in the WHERE clause of a single statement
+    instead of reading the row first and calling check_authorization on it.
+    """
+    if current_user.get("is_m2m", False):
+        check_authorization(current_user, None, required_scope)
+        return None
+    return owner_id_of(current_user)
+
+
+def require_admin(current_user: Dict = Depends(get_current_user)) -> Dict:
+    """Allow M2M clients with ADMIN_SCOPE and users listed in ADMIN_EMAILS"""
+    if current_user.get("is_m2m", False):
+        allowed = settings.ADMIN_SCOPE in current_user.get("scope", "").split()
+    else:
+        allowed = current_user.get("email") in settings.ADMIN_EMAILS
+    if not allowed:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions",
+        )
+    return current_user
@@ -0,0 +1,89 @@
+import asyncio
+from typing import Awaitable, Callable, Dict, Hashable, TypeVar
+
+from app.core.metrics import registry
+
+T = TypeVar("T")
+
+SINGLEFLIGHT_CALLS = registry.counter(
+    "singleflight_calls_total",
+    "Lookups that ran the query (leader) or shared another's (coalesced)",
+    ["group", "role"],
+)
+
+
+class _LeaderCancelled(Exception):
+    """The leading call was cancelled; waiters should retry on their own"""
+
+
+class SingleFlight:
+    """Collapse concurrent identical async calls into one.
+
+    The first caller for a key runs the function, using its own request's DB
+    session; callers arriving while it is in flight await the same result
+    (or exception). Waiters share the returned object, so it must be treated
+    as read-only. If the leader is cancelled, waiters retry and one of them
+    becomes the new leader.
+    """
+
+    def __init__(self, group: str):
+        self.group = group
+        self._calls: Dict[Hashable, asyncio.Future] = {}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        while (future := self._calls.get(key)) is not None:
+            try:
+                result = await asyncio.shield(future)
+            except _LeaderCancelled:
+                continue
+            SINGLEFLIGHT_CALLS.inc(group=self.group, role="coalesced")
+            return result
+
+        future = asyncio.get_running_loop().create_future()
+        self._calls[key] = future
+        SINGLEFLIGHT_CALLS.inc(group=self.group, role="leader")
+        try:
+            result = await fn()
+        except asyncio.CancelledError:
+            future.set_exception(_LeaderCancelled())
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            del self._calls[key]
+            if future.done() and not future.cancelled():
+                # Mark the exception retrieved when nobody was waiting.
+                future.exception()
+
+
+class BackgroundRefresh:
+    """Runs a refresh coroutine at most once at a time.
+
+    `start` kicks off a refresh unless one is already running and returns its
+    task without waiting; `run` joins it. The task is shielded so a caller
+    that gets cancelled does not cancel the refresh for everyone else, and
+    failures nobody awaited are marked retrieved instead of being logged by
+    asyncio.
+    """
+
+    def __init__(self, refresh: Callable[[], Awaitable[None]]):
+        self._refresh = refresh
+        self._task: asyncio.Task | None = None
+
+    def start(self) -> asyncio.Task:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._refresh())
+            self._task.add_done_callback(_consume_exception)
+        return self._task
+
+    async def run(self) -> None:
+        await asyncio.shield(self.start())
+
+
+def _consume_exception(task: asyncio.Task) -> None:
+    if not task.cancelled():
+        task.exception()
@@ -0,0 +1,170 @@
+"""Per-statement statistics and the slow-query log.
+
+Statements are grouped by fingerprint: the SQL with literals, bind
+placeholders and expanded IN lists collapsed, so `WHERE id IN (?, ?, ?)` and
+`WHERE id IN (?, ?)` share a row. The table is the place to spot N+1
+patterns: a fingerprint whose count tracks the request count times N.
+Bind values never leave the process; the slow-query log only shows their
+types.
+"""
+
+import functools
+import json
+import logging
+import re
+import threading
+from collections import Counter
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+OVERFLOW_FINGERPRINT = "<other statements>"
+
+_WHITESPACE = re.compile(r"\s+")
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"(?<![\w$])-?\d+(?:\.\d+)?\b")
+# asyncpg's `$1::INTEGER`, sqlite's `?` and the pyformat styles.
+_PLACEHOLDER = re.compile(r"\$\d+(?:::\w+(?:\[\])?)?|%\(\w+\)s|%s|\?")
+_PLACEHOLDER_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_VALUES_LIST = re.compile(r"(VALUES\s*\(\.\.\.\))(?:\s*,\s*\(\.\.\.\))+", re.I)
+
+
+@functools.lru_cache(maxsize=2048)
+def fingerprint(statement: str) -> str:
+    sql = _WHITESPACE.sub(" ", statement).strip()
+    sql = _STRING_LITERAL.sub("?", sql)
+    sql = _PLACEHOLDER.sub("?", sql)
+    sql = _NUMBER_LITERAL.sub("?", sql)
+    sql = _PLACEHOLDER_LIST.sub("(...)", sql)
+    return _VALUES_LIST.sub(r"\1", sql)
+
+
+def redact_parameters(parameters):
+    """Replace bind values with their type names, keeping the shape"""
+    if isinstance(parameters, dict):
+        return {key: type(value).__name__ for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        if parameters and isinstance(parameters[0], (dict, list, tuple)):
+            return f"<{len(parameters)} parameter sets>"
+        return [type(value).__name__ for value in parameters]
+    return type(parameters).__name__
+
+
+class _Entry:
+    __slots__ = ("count", "errors", "total", "max", "rows", "operations")
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.rows = 0
+        self.operations: Counter = Counter()
+
+
+class StatementStats:
+    """Aggregates statement executions by fingerprint.
+
+    Once `max_fingerprints` distinct statements have been seen, new ones are
+    folded into a single overflow row so the table stays bounded.
+    """
+
+    def __init__(self, max_fingerprints: int = 1000, slow_threshold: float = 0.2):
+        self.max_fingerprints = max_fingerprints
+        self.slow_threshold = slow_threshold
+        self._entries: dict[str, _Entry] = {}
+        self._lock = threading.Lock()
+
+    def _entry(self, statement: str) -> _Entry:
+        key = fingerprint(statement)
+        entry = self._entries.get(key)
+        if entry is None:
+            if len(self._entries) >= self.max_fingerprints:
+                key = OVERFLOW_FINGERPRINT
+                entry = self._entries.get(key)
+            if entry is None:
+                entry = self._entries[key] = _Entry()
+        return entry
+
+    def observe(
+        self,
+        statement: str,
+        parameters,
+        seconds: float,
+        rows: int,
+        operation: str,
+    ) -> None:
+        with self._lock:
+            entry = self._entry(statement)
+            entry.count += 1
+            entry.total += seconds
+            entry.rows += rows
+            entry.operations[operation] += 1
+            if seconds > entry.max:
+                entry.max = seconds
+        if seconds >= self.slow_threshold:
+            logger.warning(
+                "slow query %s",
+                json.dumps(
+                    {
+                        "operation": operation,
+                        "ms": round(seconds * 1000, 3),
+                        "rows": rows,
+                        "statement": _WHITESPACE.sub(" ", statement).strip(),
+                        "parameters": redact_parameters(parameters),
+                    }
+                ),
+            )
+
+    def observe_error(self, statement: str, operation: str) -> None:
+        with self._lock:
+            entry = self._entry(statement)
+            entry.errors += 1
+            entry.operations[operation] += 1
+
+    def snapshot(self, sort: str = "total_ms", limit: int | None = None) -> list:
+        with self._lock:
+            rows = [
+                {
+                    "fingerprint": key,
+                    "count": entry.count,
+                    "errors": entry.errors,
+                    "total_ms": round(entry.total * 1000, 3),
+                    "avg_ms": round(entry.total / entry.count * 1000, 3)
+                    if entry.count
+                    else 0.0,
+                    "max_ms": round(entry.max * 1000, 3),
+                    "rows": entry.rows,
+                    "avg_rows": round(entry.rows / entry.count, 2)
+                    if entry.count
+                    else 0.0,
+                    "operations": dict(entry.operations.most_common(5)),
+                }
+                for key, entry in self._entries.items()
+            ]
+        rows.sort(key=lambda row: row[sort], reverse=True)
+        return rows[:limit] if limit else rows
+
+    def reset(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+def row_count(cursor) -> int:
+    """Rows a statement returned or affected.
+
+    The asyncio DBAPI adapters buffer a plain cursor's whole result before
+    the execute events fire, so the buffer size is the number of rows
+    returned; server-side cursors report none.
+    """
+    if cursor.description is not None:
+        buffered = getattr(cursor, "_rows", None)
+        return len(buffered) if buffered is not None else 0
+    return max(cursor.rowcount, 0)
+
+
+statement_stats = StatementStats(
+    settings.STATEMENT_STATS_MAX_FINGERPRINTS,
+    settings.SLOW_QUERY_THRESHOLD_MS / 1000,
+)
@@ -0,0 +1,107 @@
+"""Per-request phase timings for sampled requests.
+
+`TimingMiddleware` starts a `RequestTiming` for each sampled request and keeps
+it in a context variable; the auth dependency, the DB cursor events, the
+bcrypt pool and the route class add their phases to it. Outside a sampled
+request every hook is a single context variable lookup.
+"""
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+
+# Upper bound on the individual events kept for the slow-request trace; phase
+# totals keep counting past it.
+MAX_TRACE_EVENTS = 200
+
+_current: ContextVar["RequestTiming | None"] = ContextVar(
+    "request_timing", default=None
+)
+
+
+class RequestTiming:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases: dict[str, list] = {}  # name -> [seconds, count]
+        self.events: list[tuple[str, str | None, float, float]] = []
+        self.dropped_events = 0
+        # Marks set by the route class to split dependency resolution,
+        # handler body and response encoding.
+        self.route_started: float | None = None
+        self.handler_finished: float | None = None
+
+    def add(self, phase: str, seconds: float, detail: str | None = None) -> None:
+        totals = self.phases.setdefault(phase, [0.0, 0])
+        totals[0] += seconds
+        totals[1] += 1
+        if len(self.events) < MAX_TRACE_EVENTS:
+            offset = time.perf_counter() - seconds - self.started
+            self.events.append((phase, detail, offset, seconds))
+        else:
+            self.dropped_events += 1
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def server_timing(self) -> str:
+        """Phase totals as a `Server-Timing` header value, in milliseconds"""
+        entries = []
+        for phase, (seconds, count) in self.phases.items():
+            entry = f"{phase};dur={seconds * 1000:.2f}"
+            if count > 1:
+                entry += f';desc="{count}x"'
+            entries.append(entry)
+        entries.append(f"total;dur={self.elapsed() * 1000:.2f}")
+        return ", ".join(entries)
+
+    def trace(self) -> dict:
+        return {
+            "total_ms": round(self.elapsed() * 1000, 3),
+            "phases": {
+                phase: {"ms": round(seconds * 1000, 3), "count": count}
+                for phase, (seconds, count) in self.phases.items()
+            },
+            "events": [
+                {
+                    "phase": phase,
+                    "detail": detail,
+                    "start_ms": round(offset * 1000, 3),
+                    "ms": round(seconds * 1000, 3),
+                }
+                for phase, detail, offset, seconds in self.events
+            ],
+            "dropped_events": self.dropped_events,
+        }
+
+
+def start_request_timing() -> tuple[RequestTiming, Token]:
+    timing = RequestTiming()
+    return timing, _current.set(timing)
+
+
+def stop_request_timing(token: Token) -> None:
+    _current.reset(token)
+
+
+def current_timing() -> RequestTiming | None:
+    return _current.get()
+
+
+def record(phase: str, seconds: float, detail: str | None = None) -> None:
+    timing = _current.get()
+    if timing is not None:
+        timing.add(phase, seconds, detail)
+
+
+@contextmanager
+def timed(phase: str, detail: str | None = None):
+    """Add the time spent in the block to `phase` of the current request"""
+    timing = _current.get()
+    if timing is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timing.add(phase, time.perf_counter() - start, detail)
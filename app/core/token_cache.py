@@ -0,0 +1,95 @@
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Dict, Set, Tuple
+
+from app.core.config import settings
+from app.core.metrics import registry
+
+TOKEN_CACHE_LOOKUPS = registry.counter(
+    "token_cache_lookups_total", "Verified-token cache lookups", ["result"]
+)
+TOKEN_CACHE_EVICTIONS = registry.counter(
+    "token_cache_evictions_total", "Entries evicted because the cache was full"
+)
+
+
+class TokenCache:
+    """Bounded LRU of already verified bearer tokens.
+
+    Entries are keyed by the SHA-256 digest of the token (the raw token is
+    never stored) and hold the resolved principal until the token's `exp`.
+    Principals are indexed by user id so that updating or deleting a user
+    drops every cached token that resolved to them.
+    """
+
+    def __init__(self, maxsize: int = 10000):
+        self.maxsize = maxsize
+        self._entries: OrderedDict[bytes, Tuple[Dict, float]] = OrderedDict()
+        self._by_user: Dict[str, Set[bytes]] = {}
+
+    @staticmethod
+    def _digest(token: str) -> bytes:
+        return hashlib.sha256(token.encode()).digest()
+
+    def get(self, token: str) -> Dict | None:
+        digest = self._digest(token)
+        entry = self._entries.get(digest)
+        if entry is None:
+            TOKEN_CACHE_LOOKUPS.inc(result="miss")
+            return None
+
+        principal, expires_at = entry
+        if expires_at <= time.time():
+            self._remove(digest)
+            TOKEN_CACHE_LOOKUPS.inc(result="expired")
+            return None
+
+        self._entries.move_to_end(digest)
+        TOKEN_CACHE_LOOKUPS.inc(result="hit")
+        return dict(principal)
+
+    def set(self, token: str, principal: Dict, expires_at: float) -> None:
+        if self.maxsize <= 0 or expires_at <= time.time():
+            return
+
+        digest = self._digest(token)
+        if digest in self._entries:
+            self._remove(digest)
+        while len(self._entries) >= self.maxsize:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            TOKEN_CACHE_EVICTIONS.inc()
+
+        self._entries[digest] = (dict(principal), expires_at)
+        user_id = principal.get("id")
+        if user_id is not None:
+            self._by_user.setdefault(str(user_id), set()).add(digest)
+
+    def _remove(self, digest: bytes) -> None:
+        principal, _ = self._entries.pop(digest)
+        user_id = principal.get("id")
+        if user_id is None:
+            return
+        digests = self._by_user.get(str(user_id))
+        if digests is not None:
+            digests.discard(digest)
+            if not digests:
+                del self._by_user[str(user_id)]
+
+    def invalidate_user(self, user_id) -> None:
+        """Drop every cached token that resolved to `user_id`."""
+        for digest in self._by_user.pop(str(user_id), set()):
+            self._entries.pop(digest, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._by_user.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+token_cache = TokenCache(
+    maxsize=settings.TOKEN_CACHE_MAX_SIZE if settings.TOKEN_CACHE_ENABLED else 0
+)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, ForeignKey
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, Index
 from sqlalchemy.orm import relationship
 
 from app.core.database import Base
@@ -6,11 +6,15 @@ from app.core.database import Base
 
 class Item(Base):
     __tablename__ = "items"
+    # Serves owner filters and keyset pagination on id within an owner.
+    __table_args__ = (Index("ix_items_owner_id_id", "owner_id", "id"),)
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, nullable=False)
     description = Column(String)
     price = Column(Float, default=0.0)
     owner_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    # Bumped by every update; exposed to clients as the ETag.
+    version = Column(Integer, nullable=False, default=1, server_default="1")
 
     owner = relationship("User", back_populates="items")
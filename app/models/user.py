@@ -1,15 +1,30 @@
-from sqlalchemy import Column, String, Integer
+from sqlalchemy import Column, DateTime, Index, String, Integer, text
 from sqlalchemy.orm import relationship
 
 from app.core.database import Base
 
+_REVOKED = text("token_version > 0")
+
 
 class User(Base):
     __tablename__ = "users"
+    # Serves the revocation map's refresh, which only reads recent bumps.
+    __table_args__ = (
+        Index(
+            "ix_users_token_revoked_at",
+            "token_revoked_at",
+            postgresql_where=_REVOKED,
+            sqlite_where=_REVOKED,
+        ),
+    )
 
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     email = Column(String, unique=True, index=True, nullable=False)
     hashed_password = Column(String, nullable=False)
+    # Bumped to revoke every local token issued before the change.
+    token_version = Column(Integer, nullable=False, default=0, server_default="0")
+    # When token_version was last bumped.
+    token_revoked_at = Column(DateTime(timezone=True))
 
     items = relationship("Item", back_populates="owner")
     products = relationship("Product", back_populates="owner")
@@ -0,0 +1,13 @@
+from pydantic import BaseModel
+
+
+class StatementStat(BaseModel):
+    fingerprint: str
+    count: int
+    errors: int
+    total_ms: float
+    avg_ms: float
+    max_ms: float
+    rows: int
+    avg_rows: float
+    operations: dict[str, int]
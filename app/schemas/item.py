@@ -1,4 +1,6 @@
-from pydantic import BaseModel, ConfigDict
+from typing import Literal
+
+from pydantic import BaseModel, ConfigDict, Field
 
 
 class ItemBase(BaseModel):
@@ -19,5 +21,30 @@ class ItemUpdate(ItemBase):
 class ItemResponse(ItemBase):
     id: int
     owner_id: int
+    version: int
 
     model_config = ConfigDict(from_attributes=True)
+
+
+class ItemPage(BaseModel):
+    items: list[ItemResponse]
+    next_cursor: int | None = None
+
+
+class ItemBulkCreate(BaseModel):
+    items: list[ItemCreate] = Field(..., min_length=1)
+
+
+class ItemBulkUpdate(BaseModel):
+    ids: list[int] = Field(..., min_length=1)
+    changes: ItemUpdate
+
+
+class ItemBulkDelete(BaseModel):
+    ids: list[int] = Field(..., min_length=1)
+
+
+class ItemBulkResult(BaseModel):
+    id: int
+    status: Literal["created", "updated", "deleted", "not_found"]
+    item: ItemResponse | None = None
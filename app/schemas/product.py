@@ -1,4 +1,6 @@
-from pydantic import BaseModel, ConfigDict
+from typing import Literal
+
+from pydantic import BaseModel, ConfigDict, Field
 
 
 class ProductBase(BaseModel):
@@ -19,5 +21,30 @@ class ProductUpdate(ProductBase):
 class ProductResponse(ProductBase):
     id: int
     owner_id: int
+    version: int
 
     model_config = ConfigDict(from_attributes=True)
+
+
+class ProductPage(BaseModel):
+    products: list[ProductResponse]
+    next_cursor: int | None = None
+
+
+class ProductBulkCreate(BaseModel):
+    products: list[ProductCreate] = Field(..., min_length=1)
+
+
+class ProductBulkUpdate(BaseModel):
+    ids: list[int] = Field(..., min_length=1)
+    changes: ProductUpdate
+
+
+class ProductBulkDelete(BaseModel):
+    ids: list[int] = Field(..., min_length=1)
+
+
+class ProductBulkResult(BaseModel):
+    id: int
+    status: Literal["created", "updated", "deleted", "not_found"]
+    product: ProductResponse | None = None
@@ -1,18 +1,114 @@
+from typing import AsyncIterator
+
+from sqlalchemy.engine import RowMapping
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-from sqlalchemy.orm import selectinload
+from sqlalchemy import delete, insert, select, update
 
+from app.core.cache import EntityCache, entity_cache_backend
+from app.core.config import settings
+from app.core.database import is_replica_session, row_dicts
+from app.core.query_metrics import instrument_service
+from app.core.singleflight import SingleFlight
 from app.models.item import Item
-from app.schemas.item import ItemCreate, ItemUpdate
+from app.schemas.item import ItemCreate, ItemResponse, ItemUpdate
+
+EXPORT_COLUMNS = ("id", "name", "description", "price", "owner_id")
+# Columns backing ItemResponse, for reads that skip building ORM instances.
+RESPONSE_COLUMNS = tuple(getattr(Item, name) for name in ItemResponse.model_fields)
+
+item_flight = SingleFlight("items")
+item_cache = EntityCache(
+    entity_cache_backend, "items", settings.ENTITY_CACHE_TTL_SECONDS
+)
+
+
+async def _cache_item(item) -> None:
+    """Write a freshly read or written row back to the cache"""
+    response = ItemResponse.model_validate(item)
+    await item_cache.set(response.id, response.model_dump_json(), response.version)
 
 
+@instrument_service
 class ItemService:
     @staticmethod
-    async def get_item(db: AsyncSession, item_id: int) -> Item | None:
-        result = await db.execute(
-            select(Item).where(Item.id == item_id).options(selectinload(Item.owner))
+    async def get_item_row(db: AsyncSession, item_id: int) -> dict | None:
+        """Just the ItemResponse columns, without building an ORM instance"""
+        rows = row_dicts(
+            await db.execute(select(*RESPONSE_COLUMNS).where(Item.id == item_id))
+        )
+        return rows[0] if rows else None
+
+    @staticmethod
+    async def get_item_response(
+        db: AsyncSession, item_id: int, use_cache: bool = True
+    ) -> ItemResponse | None:
+        """Read-through cached ItemResponse.
+
+        Updates write their new row back and deletes invalidate, and a fill
+        never replaces a newer cached version. Only primary reads fill the
+        cache, since a lagging replica could store a row older than the last
+        write. Pass `use_cache=False` to read straight from `db`, e.g. for a
+        client that must see its own recent write.
+        """
+        if not use_cache:
+            row = await ItemService.get_item_row(db, item_id)
+            return None if row is None else ItemResponse.model_validate(row)
+
+        cached = await item_cache.get(item_id)
+        if cached is not None:
+            return ItemResponse.model_validate_json(cached)
+
+        async def load() -> ItemResponse | None:
+            row = await ItemService.get_item_row(db, item_id)
+            if row is None:
+                return None
+            response = ItemResponse.model_validate(row)
+            if not is_replica_session(db):
+                await item_cache.set(
+                    item_id, response.model_dump_json(), response.version
+                )
+            return response
+
+        # Concurrent misses for the same id share one query.
+        return await item_flight.do(item_id, load)
+
+    @staticmethod
+    async def list_items(
+        db: AsyncSession,
+        owner_id: int | None = None,
+        min_price: float | None = None,
+        max_price: float | None = None,
+        after_id: int | None = None,
+        limit: int = 50,
+    ) -> list[dict]:
+        """Return up to `limit` item rows ordered by id, starting after `after_id`"""
+        query = select(*RESPONSE_COLUMNS).order_by(Item.id).limit(limit)
+        if owner_id is not None:
+            query = query.where(Item.owner_id == owner_id)
+        if min_price is not None:
+            query = query.where(Item.price >= min_price)
+        if max_price is not None:
+            query = query.where(Item.price <= max_price)
+        if after_id is not None:
+            query = query.where(Item.id > after_id)
+        result = await db.execute(query)
+        return row_dicts(result)
+
+    @staticmethod
+    async def stream_items(
+        db: AsyncSession, owner_id: int | None = None, batch_size: int = 1000
+    ) -> AsyncIterator[RowMapping]:
+        """Yield item rows through a server-side cursor, `batch_size` at a time"""
+        query = (
+            select(*(getattr(Item, column) for column in EXPORT_COLUMNS))
+            .order_by(Item.id)
+            .execution_options(yield_per=batch_size)
         )
-        return result.scalar_one_or_none()
+        if owner_id is not None:
+            query = query.where(Item.owner_id == owner_id)
+        result = await db.stream(query)
+        async for row in result.mappings():
+            yield row
 
     @staticmethod
     async def create_item(
@@ -29,28 +125,123 @@ class ItemService:
         await db.refresh(db_item)
         return db_item
 
+    @staticmethod
+    async def get_owner_and_version(
+        db: AsyncSession, item_id: int
+    ) -> tuple[int, int] | None:
+        result = await db.execute(
+            select(Item.owner_id, Item.version).where(Item.id == item_id)
+        )
+        row = result.one_or_none()
+        return None if row is None else tuple(row)
+
     @staticmethod
     async def update_item(
-        db: AsyncSession, item_id: int, item_data: ItemUpdate, owner_id: str
-    ) -> Item:
-        item = await ItemService.get_item(db, item_id)
-        if not item:
-            return None
+        db: AsyncSession,
+        item_id: int,
+        item_data: ItemUpdate,
+        owner_id: int | None = None,
+        versions: list[int] | None = None,
+    ) -> Item | None:
+        """Update in a single UPDATE ... RETURNING round trip.
 
+        When `owner_id` is given only a row owned by it matches, so ownership is
+        enforced by the WHERE clause instead of a prior read. `versions` does the
+        same for If-Match: the row only matches at one of those versions.
+        """
         update_data = item_data.model_dump(exclude_unset=True)
-        for field, value in update_data.items():
-            setattr(item, field, value)
+        criteria = [Item.id == item_id]
+        if owner_id is not None:
+            criteria.append(Item.owner_id == owner_id)
+        if versions is not None:
+            criteria.append(Item.version.in_(versions))
+
+        if not update_data:
+            result = await db.execute(select(Item).where(*criteria))
+            return result.scalar_one_or_none()
 
+        result = await db.execute(
+            update(Item)
+            .where(*criteria)
+            .values(**update_data, version=Item.version + 1)
+            .returning(Item)
+        )
+        item = result.scalar_one_or_none()
         await db.commit()
-        await db.refresh(item)
+        if item is not None:
+            await _cache_item(item)
         return item
 
     @staticmethod
-    async def delete_item(db: AsyncSession, item_id: int, owner_id: str) -> bool:
-        item = await ItemService.get_item(db, item_id)
-        if not item:
-            return False
+    async def delete_item(
+        db: AsyncSession, item_id: int, owner_id: int | None = None
+    ) -> bool:
+        """Delete in a single DELETE ... RETURNING round trip, scoped like update"""
+        criteria = [Item.id == item_id]
+        if owner_id is not None:
+            criteria.append(Item.owner_id == owner_id)
+
+        result = await db.execute(delete(Item).where(*criteria).returning(Item.id))
+        deleted = result.scalar_one_or_none() is not None
+        await db.commit()
+        if deleted:
+            await item_cache.mark_deleted(item_id)
+        return deleted
+
+    @staticmethod
+    async def get_owner_ids(
+        db: AsyncSession, item_ids: list[int], lock: bool = False
+    ) -> dict[int, int]:
+        """Map each existing id in `item_ids` to its owner_id"""
+        query = select(Item.id, Item.owner_id).where(Item.id.in_(item_ids))
+        if lock:
+            query = query.with_for_update()
+        result = await db.execute(query)
+        return dict(result.all())
+
+    @staticmethod
+    async def bulk_create_items(
+        db: AsyncSession, items_data: list[ItemCreate]
+    ) -> list[dict]:
+        """Insert all rows with multi-row INSERT ... RETURNING in one transaction"""
+        result = await db.execute(
+            insert(Item).returning(*RESPONSE_COLUMNS, sort_by_parameter_order=True),
+            [item_data.model_dump() for item_data in items_data],
+        )
+        items = row_dicts(result)
+        await db.commit()
+        return items
+
+    @staticmethod
+    async def bulk_update_items(
+        db: AsyncSession, item_ids: list[int], item_data: ItemUpdate
+    ) -> list[dict]:
+        """Apply the same changes to every id with a single UPDATE ... RETURNING"""
+        update_data = item_data.model_dump(exclude_unset=True)
+        if update_data:
+            result = await db.execute(
+                update(Item)
+                .where(Item.id.in_(item_ids))
+                .values(**update_data, version=Item.version + 1)
+                .returning(*RESPONSE_COLUMNS)
+            )
+        else:
+            result = await db.execute(
+                select(*RESPONSE_COLUMNS).where(Item.id.in_(item_ids))
+            )
+        items = row_dicts(result)
+        await db.commit()
+        for item in items:
+            await _cache_item(item)
+        return items
 
-        await db.delete(item)
+    @staticmethod
+    async def bulk_delete_items(db: AsyncSession, item_ids: list[int]) -> list[int]:
+        """Delete every id with a single DELETE ... RETURNING, return deleted ids"""
+        result = await db.scalars(
+            delete(Item).where(Item.id.in_(item_ids)).returning(Item.id)
+        )
+        deleted_ids = list(result.all())
         await db.commit()
-        return True
+        await item_cache.mark_deleted(*deleted_ids)
+        return deleted_ids
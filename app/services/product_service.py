@@ -1,20 +1,116 @@
+from typing import AsyncIterator
+
+from sqlalchemy.engine import RowMapping
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-from sqlalchemy.orm import selectinload
+from sqlalchemy import delete, insert, select, update
 
+from app.core.cache import EntityCache, entity_cache_backend
+from app.core.config import settings
+from app.core.database import is_replica_session, row_dicts
+from app.core.query_metrics import instrument_service
+from app.core.singleflight import SingleFlight
 from app.models.product import Product
-from app.schemas.product import ProductCreate, ProductUpdate
+from app.schemas.product import ProductCreate, ProductResponse, ProductUpdate
+
+EXPORT_COLUMNS = ("id", "name", "description", "price", "owner_id")
+# Columns backing ProductResponse, for reads that skip building ORM instances.
+RESPONSE_COLUMNS = tuple(
+    getattr(Product, name) for name in ProductResponse.model_fields
+)
+
+product_flight = SingleFlight("products")
+product_cache = EntityCache(
+    entity_cache_backend, "products", settings.ENTITY_CACHE_TTL_SECONDS
+)
 
 
+async def _cache_product(product) -> None:
+    """Write a freshly read or written row back to the cache"""
+    response = ProductResponse.model_validate(product)
+    await product_cache.set(response.id, response.model_dump_json(), response.version)
+
+
+@instrument_service
 class ProductService:
     @staticmethod
-    async def get_product(db: AsyncSession, product_id: int) -> Product | None:
-        result = await db.execute(
-            select(Product)
-            .where(Product.id == product_id)
-            .options(selectinload(Product.owner))
+    async def get_product_row(db: AsyncSession, product_id: int) -> dict | None:
+        """Just the ProductResponse columns, without building an ORM instance"""
+        rows = row_dicts(
+            await db.execute(select(*RESPONSE_COLUMNS).where(Product.id == product_id))
         )
-        return result.scalar_one_or_none()
+        return rows[0] if rows else None
+
+    @staticmethod
+    async def get_product_response(
+        db: AsyncSession, product_id: int, use_cache: bool = True
+    ) -> ProductResponse | None:
+        """Read-through cached ProductResponse.
+
+        Updates write their new row back and deletes invalidate, and a fill
+        never replaces a newer cached version. Only primary reads fill the
+        cache, since a lagging replica could store a row older than the last
+        write. Pass `use_cache=False` to read straight from `db`, e.g. for a
+        client that must see its own recent write.
+        """
+        if not use_cache:
+            row = await ProductService.get_product_row(db, product_id)
+            return None if row is None else ProductResponse.model_validate(row)
+
+        cached = await product_cache.get(product_id)
+        if cached is not None:
+            return ProductResponse.model_validate_json(cached)
+
+        async def load() -> ProductResponse | None:
+            row = await ProductService.get_product_row(db, product_id)
+            if row is None:
+                return None
+            response = ProductResponse.model_validate(row)
+            if not is_replica_session(db):
+                await product_cache.set(
+                    product_id, response.model_dump_json(), response.version
+                )
+            return response
+
+        # Concurrent misses for the same id share one query.
+        return await product_flight.do(product_id, load)
+
+    @staticmethod
+    async def list_products(
+        db: AsyncSession,
+        owner_id: int | None = None,
+        min_price: float | None = None,
+        max_price: float | None = None,
+        after_id: int | None = None,
+        limit: int = 50,
+    ) -> list[dict]:
+        """Return up to `limit` product rows ordered by id, starting after `after_id`"""
+        query = select(*RESPONSE_COLUMNS).order_by(Product.id).limit(limit)
+        if owner_id is not None:
+            query = query.where(Product.owner_id == owner_id)
+        if min_price is not None:
+            query = query.where(Product.price >= min_price)
+        if max_price is not None:
+            query = query.where(Product.price <= max_price)
+        if after_id is not None:
+            query = query.where(Product.id > after_id)
+        result = await db.execute(query)
+        return row_dicts(result)
+
+    @staticmethod
+    async def stream_products(
+        db: AsyncSession, owner_id: int | None = None, batch_size: int = 1000
+    ) -> AsyncIterator[RowMapping]:
+        """Yield product rows through a server-side cursor, `batch_size` at a time"""
+        query = (
+            select(*(getattr(Product, column) for column in EXPORT_COLUMNS))
+            .order_by(Product.id)
+            .execution_options(yield_per=batch_size)
+        )
+        if owner_id is not None:
+            query = query.where(Product.owner_id == owner_id)
+        result = await db.stream(query)
+        async for row in result.mappings():
+            yield row
 
     @staticmethod
     async def create_product(
@@ -31,28 +127,127 @@ class ProductService:
         await db.refresh(db_product)
         return db_product
 
+    @staticmethod
+    async def get_owner_and_version(
+        db: AsyncSession, product_id: int
+    ) -> tuple[int, int] | None:
+        result = await db.execute(
+            select(Product.owner_id, Product.version).where(Product.id == product_id)
+        )
+        row = result.one_or_none()
+        return None if row is None else tuple(row)
+
     @staticmethod
     async def update_product(
-        db: AsyncSession, product_id: int, product_data: ProductUpdate, owner_id: str
-    ) -> Product:
-        product = await ProductService.get_product(db, product_id)
-        if not product:
-            return None
+        db: AsyncSession,
+        product_id: int,
+        product_data: ProductUpdate,
+        owner_id: int | None = None,
+        versions: list[int] | None = None,
+    ) -> Product | None:
+        """Update in a single UPDATE ... RETURNING round trip.
 
+        When `owner_id` is given only a row owned by it matches, so ownership is
+        enforced by the WHERE clause instead of a prior read. `versions` does the
+        same for If-Match: the row only matches at one of those versions.
+        """
         update_data = product_data.model_dump(exclude_unset=True)
-        for field, value in update_data.items():
-            setattr(product, field, value)
+        criteria = [Product.id == product_id]
+        if owner_id is not None:
+            criteria.append(Product.owner_id == owner_id)
+        if versions is not None:
+            criteria.append(Product.version.in_(versions))
+
+        if not update_data:
+            result = await db.execute(select(Product).where(*criteria))
+            return result.scalar_one_or_none()
 
+        result = await db.execute(
+            update(Product)
+            .where(*criteria)
+            .values(**update_data, version=Product.version + 1)
+            .returning(Product)
+        )
+        product = result.scalar_one_or_none()
         await db.commit()
-        await db.refresh(product)
+        if product is not None:
+            await _cache_product(product)
         return product
 
     @staticmethod
-    async def delete_product(db: AsyncSession, product_id: int, owner_id: str) -> bool:
-        product = await ProductService.get_product(db, product_id)
-        if not product:
-            return False
+    async def delete_product(
+        db: AsyncSession, product_id: int, owner_id: int | None = None
+    ) -> bool:
+        """Delete in a single DELETE ... RETURNING round trip, scoped like update"""
+        criteria = [Product.id == product_id]
+        if owner_id is not None:
+            criteria.append(Product.owner_id == owner_id)
 
-        await db.delete(product)
+        result = await db.execute(
+            delete(Product).where(*criteria).returning(Product.id)
+        )
+        deleted = result.scalar_one_or_none() is not None
+        await db.commit()
+        if deleted:
+            await product_cache.mark_deleted(product_id)
+        return deleted
+
+    @staticmethod
+    async def get_owner_ids(
+        db: AsyncSession, product_ids: list[int], lock: bool = False
+    ) -> dict[int, int]:
+        """Map each existing id in `product_ids` to its owner_id"""
+        query = select(Product.id, Product.owner_id).where(Product.id.in_(product_ids))
+        if lock:
+            query = query.with_for_update()
+        result = await db.execute(query)
+        return dict(result.all())
+
+    @staticmethod
+    async def bulk_create_products(
+        db: AsyncSession, products_data: list[ProductCreate]
+    ) -> list[dict]:
+        """Insert all rows with multi-row INSERT ... RETURNING in one transaction"""
+        result = await db.execute(
+            insert(Product).returning(*RESPONSE_COLUMNS, sort_by_parameter_order=True),
+            [product_data.model_dump() for product_data in products_data],
+        )
+        products = row_dicts(result)
+        await db.commit()
+        return products
+
+    @staticmethod
+    async def bulk_update_products(
+        db: AsyncSession, product_ids: list[int], product_data: ProductUpdate
+    ) -> list[dict]:
+        """Apply the same changes to every id with a single UPDATE ... RETURNING"""
+        update_data = product_data.model_dump(exclude_unset=True)
+        if update_data:
+            result = await db.execute(
+                update(Product)
+                .where(Product.id.in_(product_ids))
+                .values(**update_data, version=Product.version + 1)
+                .returning(*RESPONSE_COLUMNS)
+            )
+        else:
+            result = await db.execute(
+                select(*RESPONSE_COLUMNS).where(Product.id.in_(product_ids))
+            )
+        products = row_dicts(result)
+        await db.commit()
+        for product in products:
+            await _cache_product(product)
+        return products
+
+    @staticmethod
+    async def bulk_delete_products(
+        db: AsyncSession, product_ids: list[int]
+    ) -> list[int]:
+        """Delete every id with a single DELETE ... RETURNING, return deleted ids"""
+        result = await db.scalars(
+            delete(Product).where(Product.id.in_(product_ids)).returning(Product.id)
+        )
+        deleted_ids = list(result.all())
         await db.commit()
-        return True
+        await product_cache.mark_deleted(*deleted_ids)
+        return deleted_ids
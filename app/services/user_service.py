@@ -1,24 +1,40 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-from passlib.context import CryptContext
+from sqlalchemy import delete, func, select, update
 
+from app.core import passwords
+from app.core.query_metrics import instrument_service
+from app.core.revocation import token_revocations
+from app.core.singleflight import SingleFlight
+from app.core.token_cache import token_cache
 from app.models.user import User
 from app.schemas.user import UserCreate, UserUpdate
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+user_flight = SingleFlight("users")
 
 
+@instrument_service
 class UserService:
     @staticmethod
-    def get_password_hash(password: str) -> str:
-        return pwd_context.hash(password)
+    async def get_password_hash(password: str) -> str:
+        return await passwords.get_password_hash(password)
 
     @staticmethod
-    def verify_password(plain_password: str, hashed_password: str) -> bool:
-        return pwd_context.verify(plain_password, hashed_password)
+    async def verify_password(plain_password: str, hashed_password: str) -> bool:
+        return await passwords.verify_password(plain_password, hashed_password)
 
     @staticmethod
     async def get_user(db: AsyncSession, user_id: int) -> User | None:
+        """Load a user for reading; concurrent lookups of one id share a query.
+
+        The returned instance may belong to another request's session, so
+        write paths must use `_load_user` instead.
+        """
+        return await user_flight.do(
+            user_id, lambda: UserService._load_user(db, user_id)
+        )
+
+    @staticmethod
+    async def _load_user(db: AsyncSession, user_id: int) -> User | None:
         result = await db.execute(select(User).where(User.id == user_id))
         return result.scalar_one_or_none()
 
@@ -29,7 +45,7 @@ class UserService:
 
     @staticmethod
     async def create_user(db: AsyncSession, user_data: UserCreate) -> User:
-        hashed_password = UserService.get_password_hash(user_data.password)
+        hashed_password = await UserService.get_password_hash(user_data.password)
         db_user = User(email=user_data.email, hashed_password=hashed_password)
         db.add(db_user)
         await db.commit()
@@ -40,23 +56,62 @@ class UserService:
     async def update_user(
         db: AsyncSession, user_id: int, user_data: UserUpdate
     ) -> User:
-        user = await UserService.get_user(db, user_id)
+        user = await UserService._load_user(db, user_id)
         if not user:
             return None
 
         update_data = user_data.model_dump(exclude_unset=True)
         if "password" in update_data:
-            update_data["hashed_password"] = UserService.get_password_hash(
+            update_data["hashed_password"] = await UserService.get_password_hash(
                 update_data.pop("password")
             )
+        if update_data.keys() & {"email", "hashed_password"}:
+            # Tokens embed the email, and a new password must end old sessions.
+            update_data["token_version"] = user.token_version + 1
+            update_data["token_revoked_at"] = func.now()
 
         for field, value in update_data.items():
             setattr(user, field, value)
 
         await db.commit()
         await db.refresh(user)
+        token_revocations.set_version(user.id, user.token_version)
+        token_cache.invalidate_user(user_id)
         return user
 
+    @staticmethod
+    async def revoke_tokens(db: AsyncSession, user_id: int) -> bool:
+        """Invalidate every local token issued to the user so far"""
+        result = await db.execute(
+            update(User)
+            .where(User.id == user_id)
+            .values(token_version=User.token_version + 1, token_revoked_at=func.now())
+            .returning(User.token_version)
+        )
+        token_version = result.scalar_one_or_none()
+        await db.commit()
+        if token_version is None:
+            return False
+
+        token_revocations.set_version(user_id, token_version)
+        token_cache.invalidate_user(user_id)
+        return True
+
+    @staticmethod
+    async def delete_user(db: AsyncSession, user_id: int) -> bool:
+        """Delete in one DELETE ... RETURNING; IntegrityError if the user owns rows"""
+        result = await db.execute(
+            delete(User).where(User.id == user_id).returning(User.id)
+        )
+        deleted = result.scalar_one_or_none() is not None
+        await db.commit()
+        if not deleted:
+            return False
+
+        token_revocations.mark_deleted(user_id)
+        token_cache.invalidate_user(user_id)
+        return True
+
     @staticmethod
     async def authenticate_user(
         db: AsyncSession, email: str, password: str
@@ -64,6 +119,6 @@ class UserService:
         user = await UserService.get_user_by_email(db, email)
         if not user:
             return None
-        if not UserService.verify_password(password, user.hashed_password):
+        if not await UserService.verify_password(password, user.hashed_password):
             return None
         return user
@@ -1,14 +1,45 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
+from app.api import metrics
+from app.api.middleware import (
+    MetricsMiddleware,
+    ProfilingMiddleware,
+    TimingMiddleware,
+)
 from app.api.v1.api import api_router
 from app.core.config import settings
+from app.core.database import engine
+from app.core.http_client import close_http_client, get_http_client
+from app.core.profiling import install_signal_handler
 import uvicorn
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    get_http_client()
+    if settings.PROFILE_SIGNAL_ENABLED:
+        install_signal_handler()
+    yield
+    await close_http_client()
+    await engine.dispose()
+
+
 app = FastAPI(
     title=settings.PROJECT_NAME,
-    openapi_url=f"{settings.API_V1_STR}/openapi.json"
+    openapi_url=f"{settings.API_V1_STR}/openapi.json",
+    lifespan=lifespan,
 )
 
 app.include_router(api_router, prefix=settings.API_V1_STR)
+app.add_middleware(TimingMiddleware)
+
+if settings.PROFILE_REQUEST_KEY:
+    app.add_middleware(ProfilingMiddleware)
+
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+    app.include_router(metrics.router)
 
 if __name__ == "__main__":
-    uvicorn.run(app, host="0.0.0.0", port=8000) 
\ No newline at end of file
+    uvicorn.run(app, host="0.0.0.0", port=8000)
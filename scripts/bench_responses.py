@@ -0,0 +1,137 @@
+"""Per-request CPU cost of item list responses, before and after the fast path.
+
+"before" is the original shape: ORM instances returned to FastAPI, which
+validates them against `response_model` and encodes with `json.dumps`.
+"after" selects RESPONSE_COLUMNS into plain dicts and serializes them in
+pydantic-core via PydanticJSONResponse. Both run the same query against an
+in-memory SQLite database through the full ASGI stack, so the numbers cover
+row hydration, validation and encoding.
+
+    python -m scripts.bench_responses --requests 500 --page-size 1 --page-size 50
+"""
+
+import asyncio
+import json
+import os
+import time
+
+import click
+import httpx
+from fastapi import FastAPI
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+
+from scripts.benchmark import BENCH_ENVIRONMENT
+
+
+def _build_app(engine, page_size: int) -> FastAPI:
+    from app.api.responses import PydanticJSONResponse
+    from app.core.database import row_dicts
+    from app.models.item import Item
+    from app.schemas.item import ItemPage
+    from app.services.item_service import RESPONSE_COLUMNS
+
+    app = FastAPI()
+
+    @app.get("/before", response_model=ItemPage)
+    async def before():
+        with Session(engine) as db:
+            items = list(db.scalars(select(Item).order_by(Item.id).limit(page_size)))
+        return {"items": items, "next_cursor": None}
+
+    @app.get("/after", response_model=ItemPage)
+    async def after():
+        with engine.connect() as conn:
+            items = row_dicts(
+                conn.execute(
+                    select(*RESPONSE_COLUMNS).order_by(Item.id).limit(page_size)
+                )
+            )
+        return PydanticJSONResponse(ItemPage, {"items": items, "next_cursor": None})
+
+    return app
+
+
+def _seed(engine, rows: int) -> None:
+    from app.core.database import Base
+    from app.models import item, product, user  # noqa: F401  (register tables)
+    from app.models.item import Item
+    from app.models.user import User
+
+    Base.metadata.create_all(engine)
+    with Session(engine) as db:
+        db.add(User(id=1, email="bench@example.com", hashed_password="x"))
+        db.flush()
+        db.execute(
+            insert(Item),
+            [
+                {"name": f"item {i}", "description": "bench", "price": i, "owner_id": 1}
+                for i in range(rows)
+            ],
+        )
+        db.commit()
+
+
+async def _measure(app: FastAPI, path: str, requests: int, warmup: int) -> dict:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as c:
+        for _ in range(warmup):
+            (await c.get(path)).raise_for_status()
+        cpu_start, wall_start = time.process_time(), time.perf_counter()
+        for _ in range(requests):
+            (await c.get(path)).raise_for_status()
+        cpu = time.process_time() - cpu_start
+        wall = time.perf_counter() - wall_start
+    return {
+        "cpu_us_per_request": round(cpu / requests * 1e6, 1),
+        "wall_us_per_request": round(wall / requests * 1e6, 1),
+    }
+
+
+async def _run(page_sizes: tuple[int, ...], requests: int, warmup: int) -> list:
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    _seed(engine, max(page_sizes))
+    results = []
+    for page_size in page_sizes:
+        app = _build_app(engine, page_size)
+        before = await _measure(app, "/before", requests, warmup)
+        after = await _measure(app, "/after", requests, warmup)
+        results.append(
+            {
+                "page_size": page_size,
+                "before": before,
+                "after": after,
+                "cpu_speedup": round(
+                    before["cpu_us_per_request"] / after["cpu_us_per_request"], 2
+                ),
+            }
+        )
+    engine.dispose()
+    return results
+
+
+@click.command()
+@click.option("--requests", default=300, show_default=True)
+@click.option("--warmup", default=30, show_default=True)
+@click.option(
+    "--page-size",
+    "page_sizes",
+    multiple=True,
+    type=int,
+    default=(1, 50, 500),
+    show_default=True,
+)
+def main(requests, warmup, page_sizes):
+    """Compare per-request CPU of ORM + response_model vs. the fast JSON path"""
+    # The app's settings are loaded on first import and require these.
+    for name, value in BENCH_ENVIRONMENT.items():
+        os.environ.setdefault(name, value)
+    results = asyncio.run(_run(tuple(page_sizes), requests, warmup))
+    click.echo(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,436 @@
+"""Load benchmark for the API hot paths, run fully in-process.
+
+The FastAPI app is driven through httpx's ASGI transport against a scratch
+database, with Auth0 (JWKS and the client-credentials endpoint) replaced by
+an in-memory mock that signs real RS256 tokens. Each scenario reports
+latency percentiles and throughput as JSON, so runs can be diffed across
+commits:
+
+    python -m scripts.benchmark --output before.json
+    python -m scripts.benchmark --output after.json
+    diff before.json after.json
+
+The target database's tables are dropped and recreated. By default a
+temporary SQLite file is used; pass --database-url to benchmark against a
+scratch Postgres (or "sqlite+aiosqlite://" for in-memory, with
+--concurrency 1) instead. App settings are read from the
+environment as usual, e.g. FAST_JSON_RESPONSES=true.
+"""
+
+import asyncio
+import base64
+import itertools
+import json
+import os
+import platform
+import subprocess
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import click
+import httpx
+import jwt
+from cryptography.hazmat.primitives.asymmetric import rsa
+from sqlalchemy.pool import StaticPool
+
+BENCH_ENVIRONMENT = {
+    "AUTH0_DOMAIN": "bench.auth0.test",
+    "AUTH0_API_AUDIENCE": "https://bench.api.test",
+    "AUTH0_M2M_CLIENT_ID": "bench-client",
+    "AUTH0_M2M_CLIENT_SECRET": "bench-secret",
+    "SECRET_KEY": "bench-secret-key",
+}
+BENCH_PASSWORD = "bench-password"
+M2M_SCOPE = "read:items create:items update:items read:products"
+
+SCENARIOS = (
+    "login",
+    "m2m_login",
+    "local_read",
+    "auth0_read",
+    "list",
+    "create",
+    "update",
+    "bulk_create",
+    "bulk_update",
+)
+# bcrypt makes logins orders of magnitude slower than everything else.
+SLOW_SCENARIOS = {"login"}
+
+
+def _b64(value: int) -> str:
+    data = value.to_bytes((value.bit_length() + 7) // 8, "big")
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+
+class MockAuth0:
+    """Serves a JWKS document and client-credentials tokens for one RSA key"""
+
+    kid = "bench-key"
+
+    def __init__(self, domain: str, audience: str):
+        self.domain = domain
+        self.audience = audience
+        self.private_key = rsa.generate_private_key(
+            public_exponent=65537, key_size=2048
+        )
+
+    def jwks(self) -> dict:
+        numbers = self.private_key.public_key().public_numbers()
+        return {
+            "keys": [
+                {
+                    "kty": "RSA",
+                    "kid": self.kid,
+                    "use": "sig",
+                    "alg": "RS256",
+                    "n": _b64(numbers.n),
+                    "e": _b64(numbers.e),
+                }
+            ]
+        }
+
+    def token(self, **claims) -> str:
+        now = datetime.now(timezone.utc)
+        payload = {
+            "iss": f"https://{self.domain}/",
+            "aud": self.audience,
+            "iat": now,
+            "exp": now + timedelta(hours=24),
+            **claims,
+        }
+        return jwt.encode(
+            payload, self.private_key, algorithm="RS256", headers={"kid": self.kid}
+        )
+
+    def handler(self, request: httpx.Request) -> httpx.Response:
+        if request.url.path == "/.well-known/jwks.json":
+            return httpx.Response(200, json=self.jwks())
+        if request.url.path == "/oauth/token":
+            access_token = self.token(
+                sub="bench-client@clients", gty="client-credentials", scope=M2M_SCOPE
+            )
+            return httpx.Response(
+                200,
+                json={
+                    "access_token": access_token,
+                    "expires_in": 86400,
+                    "token_type": "Bearer",
+                },
+            )
+        return httpx.Response(404)
+
+
+def _percentile(sorted_values: list[float], percent: float) -> float:
+    """Nearest-rank percentile of an ascending list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(int(round(percent / 100 * len(sorted_values))), 1)
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def _summarize(latencies: list[float], errors: int, elapsed: float) -> dict:
+    latencies = sorted(latencies)
+    to_ms = 1000
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "mean_ms": round(sum(latencies) / len(latencies) * to_ms, 3)
+        if latencies
+        else 0.0,
+        "p50_ms": round(_percentile(latencies, 50) * to_ms, 3),
+        "p95_ms": round(_percentile(latencies, 95) * to_ms, 3),
+        "p99_ms": round(_percentile(latencies, 99) * to_ms, 3),
+        "max_ms": round(latencies[-1] * to_ms, 3) if latencies else 0.0,
+    }
+
+
+async def _run_scenario(send, requests: int, concurrency: int, warmup: int) -> dict:
+    """Issue `requests` calls of `send(i)` from `concurrency` concurrent workers"""
+    for i in range(warmup):
+        await send(i)
+
+    counter = itertools.count()
+    latencies: list[float] = []
+    errors = 0
+
+    async def worker():
+        nonlocal errors
+        while (i := next(counter)) < requests:
+            start = time.perf_counter()
+            try:
+                response = await send(i)
+                failed = response.status_code >= 400
+            except Exception:
+                failed = True
+            latencies.append(time.perf_counter() - start)
+            errors += failed
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return _summarize(latencies, errors, time.perf_counter() - start)
+
+
+async def _seed(engine, users: int, items_per_user: int) -> list[int]:
+    """Recreate the schema and insert users and items; return the user ids"""
+    from sqlalchemy import insert, select
+
+    from app.core.database import Base
+    from app.core.passwords import pwd_context
+    from app.models.item import Item
+    from app.models.user import User
+
+    # One hash shared by every user keeps seeding fast at any volume.
+    hashed_password = pwd_context.hash(BENCH_PASSWORD)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.execute(
+            insert(User),
+            [
+                {"email": f"bench{n}@example.com", "hashed_password": hashed_password}
+                for n in range(users)
+            ],
+        )
+        user_ids = list(await conn.scalars(select(User.id).order_by(User.id)))
+        for user_id in user_ids:
+            if items_per_user:
+                await conn.execute(
+                    insert(Item),
+                    [
+                        {
+                            "name": f"item {n}",
+                            "description": "benchmark item",
+                            "price": n,
+                            "owner_id": user_id,
+                        }
+                        for n in range(items_per_user)
+                    ],
+                )
+    return user_ids
+
+
+async def _owned_item_ids(engine, user_ids: list[int]) -> dict[int, list[int]]:
+    from sqlalchemy import select
+
+    from app.models.item import Item
+
+    owned: dict[int, list[int]] = {user_id: [] for user_id in user_ids}
+    async with engine.connect() as conn:
+        result = await conn.execute(select(Item.id, Item.owner_id).order_by(Item.id))
+        for item_id, owner_id in result:
+            owned[owner_id].append(item_id)
+    return owned
+
+
+def _scenarios(client: httpx.AsyncClient, ctx: dict, bulk_size: int) -> dict:
+    users = ctx["users"]
+    owned = ctx["owned"]
+    all_item_ids = [item_id for ids in owned.values() for item_id in ids]
+
+    def user(i: int) -> tuple[int, dict]:
+        return users[i % len(users)]
+
+    def owned_item(i: int) -> tuple[dict, int]:
+        user_id, headers = user(i)
+        ids = owned[user_id]
+        return headers, ids[(i // len(users)) % len(ids)]
+
+    async def login(i):
+        return await client.post(
+            "/auth/token",
+            data={
+                "username": ctx["emails"][i % len(users)],
+                "password": BENCH_PASSWORD,
+            },
+        )
+
+    async def m2m_login(i):
+        return await client.post("/auth/m2m/login", json={"app_id": "app2"})
+
+    async def local_read(i):
+        headers, item_id = owned_item(i)
+        return await client.get(f"/items/{item_id}", headers=headers)
+
+    async def auth0_read(i):
+        item_id = all_item_ids[i % len(all_item_ids)]
+        return await client.get(f"/items/{item_id}", headers=ctx["m2m_headers"])
+
+    async def list_items(i):
+        _, headers = user(i)
+        return await client.get("/items/", headers=headers)
+
+    async def create(i):
+        user_id, headers = user(i)
+        body = {"name": f"new {i}", "price": i, "owner_id": user_id}
+        return await client.post("/items/", json=body, headers=headers)
+
+    async def update(i):
+        headers, item_id = owned_item(i)
+        return await client.put(f"/items/{item_id}", json={"price": i}, headers=headers)
+
+    async def bulk_create(i):
+        user_id, headers = user(i)
+        body = {
+            "items": [
+                {"name": f"bulk {i}.{n}", "price": n, "owner_id": user_id}
+                for n in range(bulk_size)
+            ]
+        }
+        return await client.post("/items/bulk", json=body, headers=headers)
+
+    async def bulk_update(i):
+        user_id, headers = user(i)
+        body = {"ids": owned[user_id][:bulk_size], "changes": {"price": i}}
+        return await client.put("/items/bulk", json=body, headers=headers)
+
+    return {
+        "login": login,
+        "m2m_login": m2m_login,
+        "local_read": local_read,
+        "auth0_read": auth0_read,
+        "list": list_items,
+        "create": create,
+        "update": update,
+        "bulk_create": bulk_create,
+        "bulk_update": bulk_update,
+    }
+
+
+def _git_revision() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def _benchmark(options: dict) -> dict:
+    from app.core import database, http_client
+    from app.core.config import settings
+    from main import app
+
+    engine = database.engine
+    if isinstance(engine.pool, StaticPool) and options["concurrency"] > 1:
+        raise click.UsageError(
+            "An in-memory SQLite database runs on one shared connection; "
+            "use --concurrency 1 or a file URL"
+        )
+    auth0 = MockAuth0(settings.AUTH0_DOMAIN, settings.AUTH0_API_AUDIENCE)
+    await http_client.use_transport(httpx.MockTransport(auth0.handler))
+
+    user_ids = await _seed(engine, options["users"], options["items_per_user"])
+    transport = httpx.ASGITransport(app=app)
+    base_url = f"http://bench{settings.API_V1_STR}"
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url=base_url) as client:
+            emails = [f"bench{n}@example.com" for n in range(len(user_ids))]
+            users = []
+            for user_id, email in zip(user_ids, emails):
+                response = await client.post(
+                    "/auth/token",
+                    data={"username": email, "password": BENCH_PASSWORD},
+                )
+                response.raise_for_status()
+                token = response.json()["access_token"]
+                users.append((user_id, {"Authorization": f"Bearer {token}"}))
+            response = await client.post("/auth/m2m/login", json={"app_id": "app2"})
+            response.raise_for_status()
+            ctx = {
+                "users": users,
+                "emails": emails,
+                "owned": await _owned_item_ids(engine, user_ids),
+                "m2m_headers": {
+                    "Authorization": f"Bearer {response.json()['access_token']}"
+                },
+            }
+
+            scenarios = _scenarios(client, ctx, options["bulk_size"])
+            results = {}
+            for name in options["scenarios"]:
+                slow = name in SLOW_SCENARIOS
+                results[name] = await _run_scenario(
+                    scenarios[name],
+                    options["login_requests"] if slow else options["requests"],
+                    options["concurrency"],
+                    min(options["warmup"], 2) if slow else options["warmup"],
+                )
+    finally:
+        await http_client.close_http_client()
+        await engine.dispose()
+
+    return {
+        "meta": {
+            "git_revision": _git_revision(),
+            "python": platform.python_version(),
+            "database": engine.url.get_backend_name(),
+            "users": options["users"],
+            "items_per_user": options["items_per_user"],
+            "bulk_size": options["bulk_size"],
+            "concurrency": options["concurrency"],
+            "settings": {
+                name: getattr(settings, name)
+                for name in (
+                    "ENTITY_CACHE_ENABLED",
+                    "FAST_JSON_RESPONSES",
+                    "LOCAL_TOKEN_STATELESS",
+                    "TOKEN_CACHE_ENABLED",
+                    "PASSWORD_HASH_WORKERS",
+                    "DB_POOL_SIZE",
+                )
+            },
+        },
+        "scenarios": results,
+    }
+
+
+@click.command()
+@click.option(
+    "--database-url",
+    help="Scratch database to benchmark against; its tables are recreated. "
+    "Defaults to a temporary SQLite file.",
+)
+@click.option("--users", default=10, show_default=True)
+@click.option("--items-per-user", default=100, show_default=True)
+@click.option("--requests", default=1000, show_default=True, help="Per scenario")
+@click.option("--login-requests", default=40, show_default=True)
+@click.option("--concurrency", default=10, show_default=True)
+@click.option("--warmup", default=20, show_default=True)
+@click.option("--bulk-size", default=100, show_default=True)
+@click.option(
+    "--scenario",
+    "scenarios",
+    multiple=True,
+    type=click.Choice(SCENARIOS),
+    help="Repeat to select scenarios; all run by default",
+)
+@click.option("--output", type=click.Path(dir_okay=False, path_type=Path))
+def main(database_url, output, scenarios, **options):
+    """Benchmark login, reads, writes and bulk operations in-process"""
+    for name, value in BENCH_ENVIRONMENT.items():
+        os.environ.setdefault(name, value)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Always set explicitly so a DATABASE_URL exported for development is
+        # never the one whose tables get dropped.
+        os.environ["DATABASE_URL"] = (
+            database_url or f"sqlite+aiosqlite:///{Path(tmp) / 'bench.db'}"
+        )
+        options["scenarios"] = scenarios or SCENARIOS
+        report = asyncio.run(_benchmark(options))
+
+    text = json.dumps(report, indent=2, sort_keys=True)
+    if output is not None:
+        output.write_text(text + "\n")
+    click.echo(text)
+
+
+if __name__ == "__main__":
+    main()
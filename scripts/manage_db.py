@@ -1,9 +1,21 @@
 import asyncio
+import csv
+import json
+import time
+from itertools import chain, islice
+from pathlib import Path
+
+import asyncpg
 import click
 from alembic.config import Config
 from alembic import command
+from sqlalchemy import make_url
+from sqlalchemy.dialects import postgresql
 from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.schema import CreateIndex, DropIndex
 from app.core.config import settings
+from app.core.database import Base, engine
+from app.models import item, product, user  # noqa: F401  (register tables)
 
 alembic_cfg = Config("alembic.ini")
 
@@ -49,5 +61,190 @@ def create_migration():
     click.echo("Migration created")
 
 
+def _read_records(path: Path, file_format: str):
+    """Yield one dict per row of an NDJSON or CSV file"""
+    with path.open(newline="") as f:
+        if file_format == "csv":
+            yield from csv.DictReader(f)
+        else:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def _empty_value(column):
+    """What an INSERT leaving `column` out would store"""
+    default = column.default
+    if default is not None and default.is_scalar:
+        return default.arg
+    if default is not None and default.is_callable:
+        return default.arg(None)
+    if column.nullable:
+        return None
+    raise ValueError("empty, and the column has no default")
+
+
+def _converters(table, columns):
+    """Per-column callables turning raw file values into COPY-ready values.
+
+    Empty values take the column's default, as they would in an INSERT that
+    leaves the column out; COPY and executemany would write NULL instead.
+    """
+    converters = []
+    for name in columns:
+        column = table.c[name]
+
+        def convert(value, column=column, python_type=column.type.python_type):
+            if value is None or value == "":
+                return _empty_value(column)
+            return python_type(value)
+
+        converters.append(convert)
+    return converters
+
+
+def _convert_records(records, columns, converters):
+    """Yield one COPY-ready tuple per record, rejecting records that don't fit"""
+    for number, record in enumerate(records, 1):
+        row = []
+        for column, convert in zip(columns, converters):
+            try:
+                row.append(convert(record.get(column)))
+            except ValueError as e:
+                raise click.ClickException(
+                    f"Record {number}, column {column}: {e}"
+                ) from e
+        yield tuple(row)
+
+
+def _batches(rows, batch_size: int, table_name: str):
+    """Split rows into lists of `batch_size`, echoing progress after each"""
+    total = 0
+    started = time.perf_counter()
+    while batch := list(islice(rows, batch_size)):
+        yield batch
+        total += len(batch)
+        elapsed = time.perf_counter() - started
+        click.echo(f"{table_name}: {total} rows ({total / elapsed:,.0f} rows/s)")
+
+
+async def _copy_rows(table, columns, rows, batch_size: int, deferred: list):
+    """Load through asyncpg's COPY, the fastest path into Postgres"""
+    dialect = postgresql.dialect()
+    drop_indexes = [
+        str(DropIndex(index, if_exists=True).compile(dialect=dialect))
+        for index in deferred
+    ]
+    create_indexes = [
+        str(CreateIndex(index, if_not_exists=True).compile(dialect=dialect))
+        for index in deferred
+    ]
+
+    dsn = settings.DATABASE_URL.replace("postgresql+asyncpg://", "postgresql://")
+    conn = await asyncpg.connect(dsn)
+    try:
+        for statement in drop_indexes:
+            await conn.execute(statement)
+
+        try:
+            for batch in _batches(rows, batch_size, table.name):
+                await conn.copy_records_to_table(
+                    table.name, records=batch, columns=columns
+                )
+        finally:
+            if deferred:
+                click.echo("Rebuilding deferred indexes")
+                for statement in create_indexes:
+                    await conn.execute(statement)
+
+        if "id" in columns:
+            # Explicit ids bypass the serial sequence, so move it past them.
+            await conn.execute(
+                f"SELECT setval(pg_get_serial_sequence('{table.name}', 'id'), "
+                f"COALESCE((SELECT MAX(id) FROM {table.name}), 1))"
+            )
+    finally:
+        await conn.close()
+
+
+async def _insert_rows(table, columns, rows, batch_size: int, deferred: list):
+    """Load with one multi-row INSERT transaction per batch (no COPY, e.g. SQLite)"""
+    async with engine.connect() as conn:
+        for index in deferred:
+            await conn.execute(DropIndex(index, if_exists=True))
+        await conn.commit()
+
+        try:
+            for batch in _batches(rows, batch_size, table.name):
+                await conn.execute(
+                    table.insert(), [dict(zip(columns, row)) for row in batch]
+                )
+                await conn.commit()
+        finally:
+            await conn.rollback()
+            if deferred:
+                click.echo("Rebuilding deferred indexes")
+                for index in deferred:
+                    await conn.execute(CreateIndex(index, if_not_exists=True))
+                await conn.commit()
+    await engine.dispose()
+
+
+async def _import_file(
+    table_name: str,
+    path: Path,
+    file_format: str,
+    batch_size: int,
+    defer_indexes: bool,
+):
+    table = Base.metadata.tables[table_name]
+    records = _read_records(path, file_format)
+    first = next(records, None)
+    if first is None:
+        click.echo("Nothing to import")
+        return
+
+    unknown = set(first) - set(table.c.keys())
+    if unknown:
+        raise click.ClickException(
+            f"Unknown {table_name} columns: {', '.join(sorted(unknown))}"
+        )
+    columns = list(first)
+    converters = _converters(table, columns)
+    rows = _convert_records(chain([first], records), columns, converters)
+    # Unique indexes back constraints, so only plain indexes are deferred.
+    deferred = (
+        [index for index in table.indexes if not index.unique] if defer_indexes else []
+    )
+
+    if make_url(settings.DATABASE_URL).get_backend_name() == "postgresql":
+        await _copy_rows(table, columns, rows, batch_size, deferred)
+    else:
+        await _insert_rows(table, columns, rows, batch_size, deferred)
+
+
+@cli.command("import")
+@click.argument("table", type=click.Choice(["users", "items", "products"]))
+@click.argument("path", type=click.Path(exists=True, dir_okay=False, path_type=Path))
+@click.option(
+    "--format",
+    "file_format",
+    type=click.Choice(["ndjson", "csv"]),
+    help="File format, inferred from the extension when omitted",
+)
+@click.option("--batch-size", default=10000, show_default=True)
+@click.option(
+    "--defer-indexes",
+    is_flag=True,
+    help="Drop non-unique indexes during the load and rebuild them afterwards",
+)
+def import_data(table, path, file_format, batch_size, defer_indexes):
+    """Bulk load NDJSON/CSV rows into a table (COPY on Postgres)"""
+    if file_format is None:
+        file_format = "csv" if path.suffix.lower() == ".csv" else "ndjson"
+    asyncio.run(_import_file(table, path, file_format, batch_size, defer_indexes))
+    click.echo("Import completed")
+
+
 if __name__ == "__main__":
     cli()